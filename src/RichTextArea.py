@@ -16,6 +16,9 @@ class RichTextArea(tk.Frame):
         super().__init__(master)
         self.master = master
         self.pack(fill=tk.BOTH, expand=True)
+        self.instant = False
+        self.animation_job = None
+        self.animation_text = ""
 
         self.create_background()
 
@@ -48,15 +51,44 @@ class RichTextArea(tk.Frame):
         self.text_area.config(yscrollcommand=self.text_scrollbar.set)
 
     def clear_text(self):
+        self.cancel_animation()
         self.text_area.delete('1.0', tk.END)
 
-    def animate_text(self, text, delay=10):
+    def animate_text(self, text, delay=16, chars_per_frame=None, max_frames=60):
+        # mainloopを止めないよう、afterでフレームごとに数文字ずつ挿入する
+        self.cancel_animation()
+        self.animation_text = text
         self.text_area.delete('1.0', tk.END)
-        for i in range(len(text)):
-            self.text_area.insert(tk.END, text[i])
+        if self.instant or not text:
+            self.text_area.insert(tk.END, text)
+            self.text_area.see(tk.END)
+            return
+        if chars_per_frame is None:
+            chars_per_frame = max(1, -(-len(text) // max_frames))
+        self.animate_step(text, 0, delay, chars_per_frame)
+
+    def animate_step(self, text, position, delay, chars_per_frame):
+        end = position + chars_per_frame
+        self.text_area.insert(tk.END, text[position:end])
+        self.text_area.see(tk.END)
+        if end < len(text):
+            self.animation_job = self.after(delay, self.animate_step, text, end, delay, chars_per_frame)
+        else:
+            self.animation_job = None
+
+    def cancel_animation(self):
+        if self.animation_job is not None:
+            self.after_cancel(self.animation_job)
+            self.animation_job = None
+
+    def set_instant(self, instant):
+        self.instant = instant
+        if instant and self.animation_job is not None:
+            # 途中のアニメーションは打ち切って全文を表示する
+            self.cancel_animation()
+            self.text_area.delete('1.0', tk.END)
+            self.text_area.insert(tk.END, self.animation_text)
             self.text_area.see(tk.END)
-            self.update()
-            self.after(delay)
 
     def create_background(self):
         self.bg_canvas = tk.Canvas(self, bg=BG_COLOR, highlightthickness=0)
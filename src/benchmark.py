@@ -0,0 +1,188 @@
+import os
+import sys
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(project_root)
+import argparse
+import json
+import subprocess
+import tempfile
+import time
+
+import config
+from controllers.settings_controller import SettingsController
+from headless import HeadlessTranslator
+from mock_deepl_server import MockDeepLServer
+from replay import settings_from_session
+from services.frame_source import SessionFrameSource, open_frame_source
+from services.backend_registry import get_backend_registry
+from services.translation_memory import get_translation_memory
+
+# ベースラインよりこの割合以上悪化したら回帰とみなす指標
+REGRESSION_METRICS = [
+    ("time_to_translation_ms", "p50"),
+    ("time_to_translation_ms", "p95"),
+    ("time_to_translation_ms", "p99"),
+    ("ocr_ms", "p95"),
+    ("client", "requests"),
+    ("client", "characters"),
+]
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+class BenchmarkProbe:
+    # パイプラインの recorder として渡し、領域の変化から翻訳表示までの時間を測る
+    def __init__(self, frame_source):
+        self.frame_source = frame_source
+        self.changed_at = {}
+        self.ocr_started = {}
+        self.ocr_ms = {}
+        self.latencies_ms = []
+
+    def record_frame(self, region, bbox, image):
+        # 表示が変わり始めた時刻を基準にする
+        self.changed_at.setdefault(region, self.frame_source.clock())
+
+    def record_ocr(self, region, text, ocr_ms=None):
+        self.ocr_started[region] = self.changed_at.pop(region, self.ocr_started.get(region))
+        if ocr_ms is not None:
+            self.ocr_ms.setdefault(region, []).append(ocr_ms)
+
+    def record_translation(self, region, source_text, translated_text):
+        changed_at = self.ocr_started.pop(region, None)
+        if changed_at is not None:
+            self.latencies_ms.append((self.frame_source.clock() - changed_at) * 1000)
+
+    def close(self):
+        pass
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=project_root, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def client_totals(backends):
+    # 全バックエンドのHTTPリクエスト数・文字数の合計 (ヘッジで二重に送った分も含む)
+    totals = {"requests": 0, "retries": 0, "characters": 0}
+    for stats in backends.values():
+        for key in totals:
+            totals[key] += stats.get(key, 0)
+    return totals
+
+
+def find_regressions(result, baseline, tolerance):
+    regressions = []
+    for group, name in REGRESSION_METRICS:
+        old = baseline.get(group, {}).get(name)
+        new = result.get(group, {}).get(name)
+        if old and new is not None and new > old * (1 + tolerance):
+            regressions.append({"metric": f"{group}.{name}", "baseline": old, "current": new})
+    return regressions
+
+
+def run_benchmark(source, settings_file=None, realtime=True, server_options=None, url=None):
+    work_dir = tempfile.mkdtemp(prefix="benchmark-")
+    # キャッシュと翻訳メモリは毎回空の状態から測る
+    config.OCR_CACHE_PATH = os.path.join(work_dir, "ocr_cache.json")
+    config.TRANSLATION_MEMORY_PATH = os.path.join(work_dir, "translation_memory.db")
+    config.CHARACTER_BUDGET_PATH = os.path.join(work_dir, "character_budget.json")
+    server = None
+    if url is None:
+        server = MockDeepLServer(**(server_options or {})).start()
+        url = server.url
+    config.DEEPL_API_URL = url
+
+    frame_source = open_frame_source(source, realtime=realtime)
+    if settings_file:
+        settings = SettingsController(settings_file).load_settings()
+    elif isinstance(frame_source, SessionFrameSource):
+        settings = settings_from_session(frame_source)
+    else:
+        raise ValueError("記録したセッション以外を使う場合は --settings が必要です")
+
+    probe = BenchmarkProbe(frame_source)
+    start = time.monotonic()
+    try:
+        with open(os.devnull, "w") as devnull:
+            translator = HeadlessTranslator(settings, frame_source, output=devnull, recorder=probe)
+            results = translator.run()
+    finally:
+        if server is not None:
+            server.stop()
+    backends = get_backend_registry().stats()
+    all_ocr_ms = [ms for values in probe.ocr_ms.values() for ms in values]
+    return {
+        "commit": current_commit(),
+        "source": source,
+        "realtime": realtime,
+        "wall_seconds": time.monotonic() - start,
+        "translations": len(results),
+        "time_to_translation_ms": summarize(probe.latencies_ms),
+        "ocr_ms": summarize(all_ocr_ms),
+        "ocr_ms_per_region": {str(region): summarize(values) for region, values in sorted(probe.ocr_ms.items())},
+        "client": client_totals(backends),
+        "backends": backends,
+        "server": server.stats() if server is not None else None,
+        "ocr_cache": translator.ocr_cache.stats(),
+        "translation_memory": get_translation_memory().stats(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="記録したフレームでパイプラインの性能を測る")
+    parser.add_argument("source", help="記録したセッション / PNGのディレクトリ / フレームアーカイブ(zip)")
+    parser.add_argument("--settings", help="領域を読み込む設定ファイル (セッションの場合は省略可)")
+    parser.add_argument("--max-speed", action="store_true",
+                        help="記録の待ち時間を飛ばす (スループット計測用。遅延の値は参考程度になる)")
+    parser.add_argument("--output", default="benchmark_result.json", help="結果のJSONファイル")
+    parser.add_argument("--baseline", help="比較するベースラインの結果JSON")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="回帰とみなす悪化の割合")
+    parser.add_argument("--url", help="モックサーバーの代わりに使う翻訳APIのURL")
+    parser.add_argument("--latency", type=float, default=0.1, help="モックサーバーの遅延 (秒)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="モックサーバーの遅延の揺れ幅 (秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="モックサーバーが503を返す割合")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="モックサーバーが429を返す割合")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server_options = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "seed": args.seed,
+    }
+    result = run_benchmark(args.source, args.settings, not args.max_speed, server_options, args.url)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            result["regressions"] = find_regressions(result, json.load(f), args.tolerance)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if result.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
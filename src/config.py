@@ -1,5 +1,60 @@
 # API KEY config
 DEEPL_API_KEY = 'YOUR API KEY'
+# DeepL endpoint (Free plan: https://api-free.deepl.com/v2/translate)
+DEEPL_API_URL = 'https://api.deepl.com/v2/translate'
+# DeepL HTTP client (seconds)
+DEEPL_CONNECT_TIMEOUT = 3.05
+DEEPL_READ_TIMEOUT = 10
+DEEPL_MAX_RETRIES = 3
+# Translation backends, tried in order (type: deepl / memory / mock; deepl takes plan "pro" / "free" or url)
+TRANSLATION_BACKENDS = [
+    {"type": "deepl", "name": "deepl"},
+    {"type": "memory", "name": "memory"},
+]
+# Hedged requests: send to the next backend when the first is slower than its p95 (None = use p95; seconds)
+HEDGE_DELAY = None
+HEDGE_DELAY_MIN = 0.3
+HEDGE_DELAY_MAX = 5.0
+# Skip a backend for BREAKER_RESET_TIMEOUT seconds after this many consecutive failures
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30
+# tessdata directory for the resident tesserocr engine (None = default)
+TESSDATA_PATH = None
+# OCR worker processes (None = number of CPU cores)
+OCR_MAX_WORKERS = None
+# Perceptual-hash OCR result cache
+OCR_CACHE_PATH = 'ocr_cache.json'
+OCR_CACHE_MAX_BYTES = 8 * 1024 * 1024
+# Hamming distance allowed on the gradient bitmap (0 = exact match; > 0 keeps each bitmap, up to 12.8 KB per entry)
+OCR_CACHE_MAX_DISTANCE = 0
+# Translation memory (SQLite)
+TRANSLATION_MEMORY_PATH = 'translation_memory.db'
+TRANSLATION_MEMORY_MAX_ENTRIES = 50000
+# Translation request scheduling
+TRANSLATION_REQUESTS_PER_SECOND = 5
+TRANSLATION_BURST = 3
+# Regions with at least this priority are still translated past the soft character limit
+TRANSLATION_ESSENTIAL_PRIORITY = 1
+# Rolling character budget (None = no limit; DeepL Free allows 500000 characters a month)
+CHARACTER_BUDGET_PATH = 'character_budget.json'
+CHARACTER_BUDGET_WINDOW_DAYS = 30
+CHARACTER_BUDGET_SOFT_LIMIT = None
+CHARACTER_BUDGET_HARD_LIMIT = None
+# Glossary: one "source<TAB>target" per line (no target = keep the term untranslated), reloaded on change
+GLOSSARY_PATH = 'glossary.tsv'
+# What @ ® © ¥ ™ (OCR'd heart glyphs) are shown as after translation (None = keep the symbol)
+GLOSSARY_SYMBOL_TARGET = '💕'
+# Session recording for replaying what the pipeline saw (None = disabled)
+SESSION_RECORDING_PATH = None
+SESSION_RECORDING_MAX_BYTES = 256 * 1024 * 1024
+SESSION_SEGMENT_BYTES = 16 * 1024 * 1024
+# Per-stage timings and counters (the stats panel turns them on while it is open)
+METRICS_ENABLED = False
+METRICS_DUMP_PATH = None
+METRICS_DUMP_INTERVAL = 10
+# Opt-in profiling: cProfile of the pipeline thread / sampled stacks of all threads
+PROFILE_PATH = None
+SAMPLING_PROFILE_PATH = None
 BG_COLOR = "#E0E5EC"
 FG_COLOR = "#000000"
 ACCENT_COLOR = "#007ACC"
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+
+class TranslationResult(NamedTuple):
+    index: int
+    source_text: str
+    translated_text: str
+    created_at: float = 0.0
+
+
+class UIUpdateQueue:
+    # ワーカースレッドが結果を積み、Tkスレッドが一定間隔でまとめて取り出す
+    def __init__(self):
+        self.items = deque()
+
+    def push(self, result):
+        self.items.append(result)
+
+    def drain(self):
+        # 同じ領域への複数の更新は最新のものだけを残す
+        latest = OrderedDict()
+        while True:
+            try:
+                result = self.items.popleft()
+            except IndexError:
+                break
+            latest.pop(result.index, None)
+            latest[result.index] = result
+        return list(latest.values())
+
+
+class UIStateSnapshot:
+    # ワーカーがTkウィジェットに触れずに読めるよう、UIの状態を複製して保持する
+    def __init__(self, auto_translate, source_texts, interval):
+        self.lock = threading.Lock()
+        self.auto_translate = tuple(auto_translate)
+        self.source_texts = tuple(source_texts)
+        self.interval = interval
+
+    def set_auto_translate(self, index, value):
+        with self.lock:
+            values = list(self.auto_translate)
+            values[index] = bool(value)
+            self.auto_translate = tuple(values)
+
+    def set_source_text(self, index, text):
+        with self.lock:
+            texts = list(self.source_texts)
+            texts[index] = text
+            self.source_texts = tuple(texts)
+
+    def add_region(self):
+        with self.lock:
+            self.auto_translate = self.auto_translate + (False,)
+            self.source_texts = self.source_texts + ("",)
+
+    def set_interval(self, interval):
+        self.interval = interval
+
+    def get_context(self, index):
+        texts = self.source_texts
+        context_before = texts[index - 1] if index > 0 else ""
+        context_after = texts[index + 1] if index < len(texts) - 1 else ""
+        return context_before, context_after
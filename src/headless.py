@@ -0,0 +1,111 @@
+import os
+import sys
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(project_root)
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from controllers.settings_controller import SettingsController
+from controllers.ui_update_queue import UIStateSnapshot
+from services.frame_source import open_frame_source
+from services.ocr_cache import OCRCache
+from services.metrics import MetricsDumper, get_metrics
+from services.ocr_worker import create_ocr_executor
+from services.profiling import SamplingProfiler
+from services.session_recorder import SessionRecorder
+from services.translation_pipeline import TranslationPipeline
+
+
+class HeadlessTranslator:
+    # Tkを使わずに キャプチャ → OCR → 翻訳 を実行し、結果をJSON Linesで出力する
+    def __init__(self, settings, frame_source, output=None, use_ocr_cache=True, recorder=None, profile_path=None):
+        self.settings = settings
+        self.frame_source = frame_source
+        self.output = output or sys.stdout
+        self.results = []
+        self.recorder = recorder
+        self.profile_path = profile_path
+        self.start_time = None
+        # 設定ファイルで自動翻訳が有効な領域だけを監視する
+        self.snapshot = UIStateSnapshot([region.auto_translate for region in settings.regions],
+                                        ["" for _ in settings.regions], settings.interval)
+        self.ocr_cache = None
+        if use_ocr_cache:
+            self.ocr_cache = OCRCache(max_distance=config.OCR_CACHE_MAX_DISTANCE, max_bytes=config.OCR_CACHE_MAX_BYTES)
+            self.ocr_cache.load(config.OCR_CACHE_PATH)
+
+    def on_result(self, i, new_text, translated_text):
+        self.snapshot.set_source_text(i, new_text)
+        result = {
+            "region": i,
+            "time": round(self.frame_source.clock(), 3),
+            "elapsed": round(time.monotonic() - self.start_time, 3),
+            "source_text": new_text,
+            "translated_text": translated_text,
+        }
+        self.results.append(result)
+        print(json.dumps(result, ensure_ascii=False), file=self.output, flush=True)
+
+    def run(self):
+        ocr_executor = create_ocr_executor()
+        translation_executor = ThreadPoolExecutor(max_workers=4)
+        pipeline = TranslationPipeline(self.settings, self.snapshot, self.on_result, ocr_executor,
+                                       translation_executor, screen_capture=self.frame_source,
+                                       ocr_cache=self.ocr_cache, recorder=self.recorder,
+                                       profile_path=self.profile_path)
+        self.start_time = time.monotonic()
+        try:
+            pipeline.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            ocr_executor.shutdown(wait=False, cancel_futures=True)
+            # 送信済みの翻訳リクエストは待つ
+            translation_executor.shutdown(wait=True, cancel_futures=True)
+            if self.ocr_cache is not None:
+                self.ocr_cache.save(config.OCR_CACHE_PATH)
+            if self.recorder is not None:
+                self.recorder.close()
+        return self.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="画面を表示せずに翻訳パイプラインを実行する")
+    parser.add_argument("--settings", default="settings.json", help="領域を読み込む設定ファイル")
+    parser.add_argument("--source", default="screen",
+                        help="screen / PNGのディレクトリ / 記録したセッション / フレームアーカイブ(zip) / アニメーション画像")
+    parser.add_argument("--fps", type=float, default=10, help="ディレクトリ再生時のフレームレート")
+    parser.add_argument("--max-speed", action="store_true", help="記録の待ち時間を飛ばして最大速度で再生する")
+    parser.add_argument("--no-ocr-cache", action="store_true", help="OCRキャッシュを使わない")
+    parser.add_argument("--record", help="セッションを記録するディレクトリ")
+    parser.add_argument("--metrics", help="段階ごとの計測結果を定期的に書き出すJSONファイル")
+    parser.add_argument("--profile", help="パイプラインのスレッドをcProfileで計測し、結果を保存するファイル")
+    parser.add_argument("--sample", help="全スレッドのスタックを採取し、collapsed形式で保存するファイル")
+    args = parser.parse_args(argv)
+
+    settings = SettingsController(args.settings).load_settings()
+    frame_source = open_frame_source(args.source, fps=args.fps, realtime=not args.max_speed)
+    recorder = None
+    if args.record:
+        recorder = SessionRecorder(args.record, config.SESSION_RECORDING_MAX_BYTES, config.SESSION_SEGMENT_BYTES)
+    metrics_dumper = None
+    if args.metrics:
+        get_metrics().enabled = True
+        metrics_dumper = MetricsDumper(get_metrics(), args.metrics, config.METRICS_DUMP_INTERVAL).start()
+    sampling_profiler = SamplingProfiler(args.sample).start() if args.sample else None
+    try:
+        HeadlessTranslator(settings, frame_source, use_ocr_cache=not args.no_ocr_cache, recorder=recorder,
+                           profile_path=args.profile).run()
+    finally:
+        if metrics_dumper is not None:
+            metrics_dumper.stop()
+        if sampling_profiler is not None:
+            sampling_profiler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import sys
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(project_root)
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.backend_registry import BackendRegistry
+from services.mock_backend import MockBackend
+
+
+def run_check(concurrency=4, rounds=2, slow_latency=3.0, fast_latency=0.01, hedge_delay=0.2):
+    # 先頭のバックエンドが遅いとき、同時に走る翻訳のすべてでヘッジが締め切りどおりに始まるか確かめる
+    registry = BackendRegistry([MockBackend("slow", latency=slow_latency), MockBackend("fast", latency=fast_latency)],
+                               hedge_delay_min=hedge_delay, hedge_delay_max=hedge_delay)
+    rounds_result = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for n in range(rounds):
+            start = time.perf_counter()
+            futures = [pool.submit(registry.translate, [f"text {n}-{i}"]) for i in range(concurrency)]
+            backends = [future.result()[1].name for future in futures]
+            rounds_result.append({"backends": backends, "seconds": time.perf_counter() - start})
+    # 締め切り + 速い方の応答 + 余裕
+    limit = hedge_delay + fast_latency + 0.5
+    passed = all(set(entry["backends"]) == {"fast"} and entry["seconds"] < limit for entry in rounds_result)
+    return {"passed": passed, "limit_seconds": limit, "rounds": rounds_result, "stats": registry.stats()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="翻訳バックエンドのヘッジが同時実行中でも効くか確かめる")
+    parser.add_argument("--concurrency", type=int, default=4, help="同時に翻訳する数 (翻訳スレッドの数)")
+    parser.add_argument("--rounds", type=int, default=2, help="繰り返す回数 (負けたヘッジが残っていても効くか)")
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    parser.add_argument("--hedge-delay", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    result = run_check(args.concurrency, args.rounds, args.slow_latency, hedge_delay=args.hedge_delay)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not result["passed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class MockDeepLServer(ThreadingHTTPServer):
+    # DeepLの /v2/translate を模したローカルサーバー。遅延・エラー・429を設定できる
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.1, latency_per_char=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=1, max_texts=50, seed=None):
+        super().__init__(address, MockDeepLHandler)
+        self.latency = latency
+        self.latency_per_char = latency_per_char
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.max_texts = max_texts
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+        self.characters = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v2/translate"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def draw(self):
+        with self.lock:
+            return self.random.random(), self.random.uniform(-self.jitter, self.jitter)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "characters": self.characters,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+            }
+
+
+class MockDeepLHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.server.stats())
+        else:
+            self.send_json(404, {"message": "Not found"})
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        params = parse_qs(self.rfile.read(length).decode(), keep_blank_values=True)
+        texts = params.get("text", [])
+        roll, jitter = server.draw()
+        with server.lock:
+            server.requests += 1
+        if not texts or "target_lang" not in params:
+            self.send_json(400, {"message": "Parameter 'text' and 'target_lang' are required"})
+            return
+        if len(texts) > server.max_texts:
+            self.send_json(413, {"message": f"Too many texts (max {server.max_texts})"})
+            return
+        if roll < server.rate_limit_rate:
+            with server.lock:
+                server.rate_limited += 1
+            self.send_json(429, {"message": "Too many requests"}, {"Retry-After": str(server.retry_after)})
+            return
+        characters = sum(len(text) for text in texts)
+        time.sleep(max(server.latency + server.latency_per_char * characters + jitter, 0))
+        if roll < server.rate_limit_rate + server.error_rate:
+            with server.lock:
+                server.errors += 1
+            self.send_json(503, {"message": "Service unavailable"})
+            return
+        with server.lock:
+            server.texts += len(texts)
+            server.characters += characters
+        target_lang = params["target_lang"][0]
+        translations = [{"detected_source_language": "EN", "text": f"[{target_lang}] {text}"} for text in texts]
+        self.send_json(200, {"translations": translations})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DeepL APIの代わりになるローカルサーバー")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.1, help="1リクエストあたりの遅延 (秒)")
+    parser.add_argument("--latency-per-char", type=float, default=0.0, help="1文字あたりの追加遅延 (秒)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="遅延の揺れ幅 (秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503を返す割合")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429を返す割合")
+    parser.add_argument("--retry-after", type=int, default=1, help="429のRetry-After (秒)")
+    parser.add_argument("--max-texts", type=int, default=50, help="1リクエストに含められるテキスト数")
+    args = parser.parse_args(argv)
+
+    server = MockDeepLServer(("127.0.0.1", args.port), args.latency, args.latency_per_char, args.jitter,
+                             args.error_rate, args.rate_limit_rate, args.retry_after, args.max_texts)
+    print("Mock DeepL server:", server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,81 @@
 import json
 
+DEFAULT_REGION_COUNT = 3
+# 以前の既定値。1セルだけの変化 (句読点の違いなど) を見逃すので、保存されていたら0として読む
+LEGACY_CHANGE_THRESHOLD = 0.0005
+
+
+class Region:
+    __slots__ = ("bbox", "auto_translate", "preprocess", "poll_min_interval", "poll_max_interval", "priority")
+
+    def __init__(self, bbox=None, auto_translate=False, preprocess=None, poll_min_interval=None,
+                 poll_max_interval=None, priority=1):
+        # preprocess / poll_*: Noneなら全体の設定を使う
+        # priority: 翻訳の優先度。会話欄は高く、HUDやバックログは0にする
+        self.bbox = bbox
+        self.auto_translate = auto_translate
+        self.preprocess = preprocess
+        self.poll_min_interval = poll_min_interval
+        self.poll_max_interval = poll_max_interval
+        self.priority = priority
+
+    @classmethod
+    def from_dict(cls, region_dict):
+        return cls(region_dict.get("bbox"), region_dict.get("auto_translate", False), region_dict.get("preprocess"),
+                   region_dict.get("poll_min_interval"), region_dict.get("poll_max_interval"),
+                   region_dict.get("priority", 1))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
 class Settings:
-    def __init__(self, regions=None, auto_translate=None, interval=1):
+    def __init__(self, regions=None, interval=1, change_threshold=0.0, settle_time=0.3, poll_min_interval=0.15,
+                 poll_backoff=1.5):
         if regions is None:
-            regions = [None, None, None]
-        if auto_translate is None:
-            auto_translate = [False, False, False]
+            regions = [Region() for _ in range(DEFAULT_REGION_COUNT)]
         self.regions = regions
-        self.auto_translate = auto_translate
         self.interval = interval
+        self.change_threshold = change_threshold
+        self.settle_time = settle_time
+        self.poll_min_interval = poll_min_interval
+        self.poll_backoff = poll_backoff
+
+    def add_region(self, bbox=None):
+        region = Region(bbox)
+        self.regions.append(region)
+        return region
 
     @classmethod
     def from_dict(cls, settings_dict):
-        regions = settings_dict.get("regions", [None, None, None])
-        auto_translate = settings_dict.get("auto_translate", [False, False, False])
+        regions = settings_dict.get("regions")
+        if regions is None:
+            regions = [Region() for _ in range(DEFAULT_REGION_COUNT)]
+        elif regions and not isinstance(regions[0], dict):
+            # 旧形式: regions / auto_translate / preprocess が別々のリスト
+            auto_translate = settings_dict.get("auto_translate", [])
+            preprocess = settings_dict.get("preprocess", [])
+            regions = [Region(bbox,
+                              auto_translate[i] if i < len(auto_translate) else False,
+                              preprocess[i] if i < len(preprocess) else None)
+                       for i, bbox in enumerate(regions)]
+        else:
+            regions = [Region.from_dict(region) for region in regions]
         interval = settings_dict.get("interval", 1)
-        return cls(regions, auto_translate, interval)
+        change_threshold = settings_dict.get("change_threshold", 0.0)
+        if change_threshold == LEGACY_CHANGE_THRESHOLD:
+            change_threshold = 0.0
+        settle_time = settings_dict.get("settle_time", 0.3)
+        poll_min_interval = settings_dict.get("poll_min_interval", 0.15)
+        poll_backoff = settings_dict.get("poll_backoff", 1.5)
+        return cls(regions, interval, change_threshold, settle_time, poll_min_interval, poll_backoff)
 
     def to_dict(self):
         return {
-            "regions": self.regions,
-            "auto_translate": self.auto_translate,
-            "interval": self.interval
-        }
\ No newline at end of file
+            "regions": [region.to_dict() for region in self.regions],
+            "interval": self.interval,
+            "change_threshold": self.change_threshold,
+            "settle_time": self.settle_time,
+            "poll_min_interval": self.poll_min_interval,
+            "poll_backoff": self.poll_backoff
+        }
@@ -0,0 +1,27 @@
+import ctypes
+import sys
+
+# Windows以外でもimportできるよう、ctypes.windll には実行時にだけ触れる
+IS_WINDOWS = sys.platform == "win32"
+
+
+def set_dpi_awareness():
+    # 高DPI環境で画面座標とキャプチャ座標がずれないようにする
+    if not IS_WINDOWS:
+        return
+    try:
+        ctypes.windll.user32.SetProcessDpiAwarenessContext(ctypes.c_void_p(-4))
+    except AttributeError:
+        try:
+            ctypes.windll.shcore.SetProcessDpiAwareness(2)
+        except (AttributeError, OSError):
+            pass
+
+
+def get_cursor_position(widget):
+    if IS_WINDOWS:
+        from ctypes import wintypes
+        point = wintypes.POINT()
+        if ctypes.windll.user32.GetCursorPos(ctypes.byref(point)):
+            return point.x, point.y
+    return widget.winfo_pointerxy()
@@ -0,0 +1,56 @@
+import os
+import sys
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(project_root)
+import argparse
+import json
+
+from controllers.settings_controller import SettingsController
+from headless import HeadlessTranslator
+from models.settings import Region, Settings
+from services.frame_source import SessionFrameSource
+
+
+def settings_from_session(frame_source):
+    # 記録された領域だけを自動翻訳の対象にする
+    bboxes = frame_source.regions()
+    count = max(bboxes, default=-1) + 1
+    return Settings(regions=[Region(bboxes.get(i), auto_translate=i in bboxes) for i in range(count)])
+
+
+def compare(reader, results):
+    recorded = reader.translations()
+    ocr_ms = sorted(entry["ocr_ms"] for entry in reader.entries
+                    if entry["type"] == "ocr" and entry.get("ocr_ms") is not None)
+    recorded_texts = [(entry["region"], entry["source_text"]) for entry in recorded]
+    replayed_texts = [(result["region"], result["source_text"]) for result in results]
+    return {
+        "frames": len(reader.frames()),
+        "recorded_translations": len(recorded),
+        "replayed_translations": len(results),
+        "same_source_texts": recorded_texts == replayed_texts,
+        "recorded_ocr_ms_p50": ocr_ms[len(ocr_ms) // 2] if ocr_ms else None,
+        "recorded_ocr_ms_max": ocr_ms[-1] if ocr_ms else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="記録したセッションを翻訳パイプラインで再生する")
+    parser.add_argument("session", help="SessionRecorderの記録ディレクトリ")
+    parser.add_argument("--max-speed", action="store_true", help="記録の待ち時間を飛ばして最大速度で再生する")
+    parser.add_argument("--settings", help="領域の設定を記録ではなく設定ファイルから読み込む")
+    parser.add_argument("--no-ocr-cache", action="store_true", help="OCRキャッシュを使わない")
+    args = parser.parse_args(argv)
+
+    frame_source = SessionFrameSource(args.session, realtime=not args.max_speed)
+    if args.settings:
+        settings = SettingsController(args.settings).load_settings()
+    else:
+        settings = settings_from_session(frame_source)
+    results = HeadlessTranslator(settings, frame_source, use_ocr_cache=not args.no_ocr_cache).run()
+    print(json.dumps(compare(frame_source.reader, results), ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,32 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(project_root)
 import tkinter as tk
 from tkinter import ttk
-from PIL import ImageGrab
-import pytesseract
-import requests
 import config
-import json
-import os
 import time
 import threading
 from concurrent.futures import ThreadPoolExecutor
-from tkinter import Toplevel, Canvas
+from tkinter import Toplevel
 
-from services.translation_service import translate_text
+from services import startup_trace
+from services.backend_registry import get_backend_registry
+from services.translation_memory import get_translation_memory
 from RichTextArea import RichTextArea
 from selection_window import SelectionWindow
-from services.pytesseract_ocr_service import PytesseractOCRService
+from services.ocr_factory import get_ocr_service
+from services.ocr_worker import create_ocr_executor, get_preprocessor, warm_up_ocr_executor
+from services.translation_pipeline import TranslationPipeline
+from services.ocr_cache import OCRCache
+from services.session_recorder import SessionRecorder
+from services.metrics import MetricsDumper, get_metrics
+from services.profiling import SamplingProfiler
 from views.clay_button import ClayButton
+from views.stats_panel import StatsPanel
 from config import TEXT_FG_COLOR, BUTTON_BG_COLOR, BUTTON_ACTIVE_BG_COLOR, BUTTON_FG_COLOR, FG_COLOR, ACCENT_COLOR, BG_COLOR, TEXT_BG_COLOR, ENTRY_BG_COLOR
 from controllers.settings_controller import SettingsController
+from models.settings import DEFAULT_REGION_COUNT
+from controllers.ui_update_queue import TranslationResult, UIStateSnapshot, UIUpdateQueue
+
+UI_FRAME_INTERVAL_MS = 33
 
 
 def create_round_rectangle(canvas, x1, y1, x2, y2, radius=25, **kwargs):
@@ -54,7 +62,6 @@ class ScreenTranslator(tk.Tk):
         super().__init__()
         self.title("Screen Text Translator")
         self.configure(bg=BG_COLOR)
-        self.highlight_windows = [None] * 3
 
         style = ttk.Style()
         style.theme_use("clam")
@@ -76,52 +83,28 @@ class ScreenTranslator(tk.Tk):
         self.settings_controller = SettingsController()
         self.settings = self.settings_controller.load_settings()
         self.regions = self.settings.regions
-        self.auto_translate_vars = [tk.IntVar(value=int(x)) for x in self.settings.auto_translate]
+        self.auto_translate_vars = []
         self.interval_var = tk.IntVar(value=max(self.settings.interval, 1))
         self.result_labels = []
         self.result_texts = []
         self.translated_text_boxes = []
         self.region_buttons = []
 
-        for i in range(3):
-            frame = ttk.Frame(result_frame, padding=15)
-            frame.pack(pady=10, fill=tk.X)
-
-            label_frame = ttk.Frame(frame)
-            label_frame.pack(side=tk.LEFT, padx=10)
-
-            label = ttk.Label(label_frame, text=f"選択範囲 {i + 1}", anchor="w", style="AccentLabel.TLabel")
-            label.pack(side=tk.TOP)
-            label.bind("<Button-1>", lambda event, index=i: self.highlight_selected_region(index))
-
-            auto_translate_check = ttk.Checkbutton(label_frame, text="自動翻訳", variable=self.auto_translate_vars[i])
-            auto_translate_check.pack(side=tk.BOTTOM, pady=5)
-
-            text_frame = ttk.Frame(frame)
-            text_frame.pack(side=tk.LEFT, padx=6, fill=tk.BOTH, expand=True)
-
-            text_box = tk.Text(text_frame, height=4, wrap=tk.WORD, borderwidth=0, highlightthickness=1,
-                               highlightcolor=ACCENT_COLOR, highlightbackground=BG_COLOR)
-            text_box.pack(fill=tk.BOTH, expand=True, pady=5)
-
-            translated_text_box = tk.Text(text_frame, height=4, wrap=tk.WORD, state="disabled", borderwidth=0,
-                                          highlightthickness=1, highlightcolor=ACCENT_COLOR, highlightbackground=BG_COLOR)
-            translated_text_box.pack(fill=tk.BOTH, expand=True, pady=5)
-
-            self.result_labels.append(label)
-            self.result_texts.append(text_box)
-            self.translated_text_boxes.append(translated_text_box)
-
-            button_frame = ttk.Frame(frame)
-            button_frame.pack(side=tk.LEFT, padx=10)
-
-            register_button = ClayButton(button_frame, text="登録", command=lambda index=i: self.register_region(index))
-            register_button.pack(side=tk.TOP, pady=5)
-
-            translate_button = ClayButton(button_frame, text="翻訳", command=lambda index=i: self.translate_region(index))
-            translate_button.pack(side=tk.BOTTOM, pady=5)
-
-            self.region_buttons.append((register_button, translate_button))
+        # 領域が多い場合はスクロールできる一覧にする
+        result_canvas = tk.Canvas(result_frame, bg=BG_COLOR, highlightthickness=0)
+        result_scrollbar = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=result_canvas.yview)
+        result_canvas.configure(yscrollcommand=result_scrollbar.set)
+        result_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        result_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.region_list = ttk.Frame(result_canvas)
+        region_list_window = result_canvas.create_window((0, 0), window=self.region_list, anchor="nw")
+        self.region_list.bind("<Configure>",
+                              lambda event: result_canvas.configure(scrollregion=result_canvas.bbox("all")))
+        result_canvas.bind("<Configure>",
+                           lambda event: result_canvas.itemconfigure(region_list_window, width=event.width))
+
+        for i in range(len(self.regions)):
+            self.create_region_row(i)
 
         interval_frame = ttk.Frame(main_frame)
         interval_frame.pack(pady=15, fill=tk.X)
@@ -131,44 +114,200 @@ class ScreenTranslator(tk.Tk):
 
         interval_entry = ttk.Entry(interval_frame, textvariable=self.interval_var, width=5)
         interval_entry.pack(side=tk.LEFT, padx=10)
+        self.interval_var.trace_add("write", lambda *args: self.on_interval_changed())
 
-        self.minsize(800, 650)
-        self.auto_translate_thread = None
-        self.after(100, self.start_auto_translate)
+        add_region_button = ClayButton(interval_frame, text="領域を追加", command=self.add_region)
+        add_region_button.pack(side=tk.RIGHT)
 
-    def auto_translate_regions(self):
-        last_texts = [""] * 3
-        while True:
-            with ThreadPoolExecutor() as executor:
-                futures = []
-                for i, region in enumerate(self.regions):
-                    if self.auto_translate_vars[i].get() and region:
-                        ocr_service = PytesseractOCRService()
-                        new_text, success = ocr_service.get_text_from_region(region)
+        self.instant_text_var = tk.IntVar(value=0)
+        instant_text_check = ttk.Checkbutton(interval_frame, text="アニメーションなし", variable=self.instant_text_var)
+        instant_text_check.pack(side=tk.LEFT, padx=10)
 
-                        if success and new_text != last_texts[i]:
-                            context_before, context_after = self.get_context(i, new_text)
-                            future = executor.submit(translate_text, new_text, context_before=context_before,
-                                                     context_after=context_after)
-                            futures.append((i, new_text, future))
-                            last_texts[i] = new_text
+        self.stats_var = tk.IntVar(value=0)
+        stats_check = ttk.Checkbutton(interval_frame, text="統計を表示", variable=self.stats_var,
+                                      command=self.toggle_stats_panel)
+        stats_check.pack(side=tk.LEFT, padx=10)
+        self.stats_panel = None
 
-                for i, new_text, future in futures:
-                    translated_text = future.result()
-                    self.after_idle(self.update_texts, i, new_text, translated_text)
-                    self.highlight_region(self.regions[i], translated_text)
+        self.snapshot = UIStateSnapshot([bool(var.get()) for var in self.auto_translate_vars],
+                                        [""] * len(self.result_texts), self.interval_var.get())
+        self.update_queue = UIUpdateQueue()
+        self.after(UI_FRAME_INTERVAL_MS, self.apply_updates)
 
-            time.sleep(max(self.interval_var.get(), 5))
+        self.minsize(800, 650)
+        self.ocr_executor = create_ocr_executor()
+        self.translation_executor = ThreadPoolExecutor(max_workers=4)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # キャッシュの読み込みはウィンドウを表示した後にバックグラウンドで行う
+        self.ocr_cache = OCRCache(max_distance=config.OCR_CACHE_MAX_DISTANCE, max_bytes=config.OCR_CACHE_MAX_BYTES)
+        self.recorder = None
+        if config.SESSION_RECORDING_PATH:
+            self.recorder = SessionRecorder(config.SESSION_RECORDING_PATH, config.SESSION_RECORDING_MAX_BYTES,
+                                            config.SESSION_SEGMENT_BYTES)
+        # 計測は統計パネルを開いている間か、設定で有効にしたときだけ行う
+        self.metrics = get_metrics()
+        self.metrics_enabled = config.METRICS_ENABLED or bool(config.METRICS_DUMP_PATH)
+        self.metrics.enabled = self.metrics_enabled
+        self.metrics_dumper = None
+        if config.METRICS_DUMP_PATH:
+            self.metrics_dumper = MetricsDumper(self.metrics, config.METRICS_DUMP_PATH,
+                                                config.METRICS_DUMP_INTERVAL).start()
+        self.sampling_profiler = None
+        if config.SAMPLING_PROFILE_PATH:
+            self.sampling_profiler = SamplingProfiler(config.SAMPLING_PROFILE_PATH).start()
+        self.pipeline = TranslationPipeline(self.settings, self.snapshot, self.on_pipeline_result,
+                                            self.ocr_executor, self.translation_executor, ocr_cache=self.ocr_cache,
+                                            recorder=self.recorder, profile_path=config.PROFILE_PATH)
+        self.exit_requested = False
+        self.after(0, self.on_first_paint)
+
+    def on_first_paint(self):
+        self.update_idletasks()
+        self.exit_requested = startup_trace.mark("first_paint")
+        threading.Thread(target=self.warm_up, daemon=True).start()
+        self.after(100, self.start_auto_translate)
 
+    def warm_up(self):
+        # 最初の翻訳が遅くならないよう、重い初期化を表示後に済ませておく
+        start = time.perf_counter()
+        steps = [
+            ("OCRキャッシュ", lambda: self.ocr_cache.load(config.OCR_CACHE_PATH)),
+            ("翻訳バックエンド", lambda: get_backend_registry().warm_up()),
+            ("翻訳メモリ", get_translation_memory),
+            ("OCRエンジン", get_ocr_service),
+            ("OCRワーカー", lambda: warm_up_ocr_executor(self.ocr_executor)),
+        ]
+        for name, step in steps:
+            try:
+                step()
+            except Exception as e:
+                print(f"{name}の準備に失敗: {e}")
+        self.metrics.observe("warm_up", (time.perf_counter() - start) * 1000)
+        if startup_trace.mark("warm_up_done"):
+            self.exit_requested = True
+
+    def create_region_row(self, i):
+        # 領域が多いときは1行あたりの高さを抑える
+        text_height = 4 if len(self.regions) <= DEFAULT_REGION_COUNT else 2
+        self.auto_translate_vars.append(tk.IntVar(value=int(self.regions[i].auto_translate)))
+
+        frame = ttk.Frame(self.region_list, padding=15)
+        frame.pack(pady=10, fill=tk.X)
+
+        label_frame = ttk.Frame(frame)
+        label_frame.pack(side=tk.LEFT, padx=10)
+
+        label = ttk.Label(label_frame, text=f"選択範囲 {i + 1}", anchor="w", style="AccentLabel.TLabel")
+        label.pack(side=tk.TOP)
+        label.bind("<Button-1>", lambda event, index=i: self.highlight_selected_region(index))
+
+        auto_translate_check = ttk.Checkbutton(label_frame, text="自動翻訳", variable=self.auto_translate_vars[i])
+        auto_translate_check.pack(side=tk.BOTTOM, pady=5)
+
+        text_frame = ttk.Frame(frame)
+        text_frame.pack(side=tk.LEFT, padx=6, fill=tk.BOTH, expand=True)
+
+        text_box = tk.Text(text_frame, height=text_height, wrap=tk.WORD, borderwidth=0, highlightthickness=1,
+                           highlightcolor=ACCENT_COLOR, highlightbackground=BG_COLOR)
+        text_box.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        translated_text_box = tk.Text(text_frame, height=text_height, wrap=tk.WORD, state="disabled", borderwidth=0,
+                                      highlightthickness=1, highlightcolor=ACCENT_COLOR, highlightbackground=BG_COLOR)
+        translated_text_box.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        self.result_labels.append(label)
+        self.result_texts.append(text_box)
+        self.translated_text_boxes.append(translated_text_box)
+
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(side=tk.LEFT, padx=10)
+
+        register_button = ClayButton(button_frame, text="登録", command=lambda index=i: self.register_region(index))
+        register_button.pack(side=tk.TOP, pady=5)
+
+        translate_button = ClayButton(button_frame, text="翻訳", command=lambda index=i: self.translate_region(index))
+        translate_button.pack(side=tk.BOTTOM, pady=5)
+
+        self.region_buttons.append((register_button, translate_button))
+
+        self.auto_translate_vars[i].trace_add("write", lambda *args, index=i: self.on_auto_translate_changed(index))
+        text_box.bind("<KeyRelease>", lambda event, index=i: self.on_source_text_edited(index))
+
+    def add_region(self):
+        self.settings.add_region()
+        self.snapshot.add_region()
+        self.create_region_row(len(self.regions) - 1)
+        self.settings_controller.save_settings(self.settings)
+
+    def on_pipeline_result(self, i, new_text, translated_text):
+        # Tkのウィジェットはメインスレッドからのみ操作する
+        self.update_queue.push(TranslationResult(i, new_text, translated_text, time.perf_counter()))
+
+    def apply_updates(self):
+        results = self.update_queue.drain()
+        for result in results:
+            start = time.perf_counter()
+            self.metrics.observe("ui_queue", (start - result.created_at) * 1000, result.index)
+            self.update_texts(result.index, result.source_text, result.translated_text)
+            self.metrics.observe("ui_render", (time.perf_counter() - start) * 1000, result.index)
+        if results:
+            latest = results[-1]
+            self.highlight_region(self.regions[latest.index].bbox, latest.translated_text)
+            if startup_trace.mark("first_translation"):
+                self.exit_requested = True
+        if self.exit_requested:
+            self.on_close()
+            return
+        self.after(UI_FRAME_INTERVAL_MS, self.apply_updates)
+
+    def on_auto_translate_changed(self, index):
+        value = bool(self.auto_translate_vars[index].get())
+        self.regions[index].auto_translate = value
+        self.snapshot.set_auto_translate(index, value)
+
+    def on_source_text_edited(self, index):
+        self.snapshot.set_source_text(index, self.result_texts[index].get("1.0", tk.END).strip())
+
+    def on_interval_changed(self):
+        try:
+            self.snapshot.set_interval(self.interval_var.get())
+        except tk.TclError:
+            pass
+
+    def on_close(self):
+        self.pipeline.stop()
+        self.ocr_cache.save(config.OCR_CACHE_PATH)
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.stop()
+        if self.sampling_profiler is not None:
+            self.sampling_profiler.stop()
+        self.ocr_executor.shutdown(wait=False, cancel_futures=True)
+        self.translation_executor.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
+
+    def toggle_stats_panel(self):
+        if self.stats_var.get():
+            if self.stats_panel is None:
+                self.metrics.enabled = True
+                self.stats_panel = StatsPanel(self, self.metrics, on_close=self.on_stats_panel_closed)
+        elif self.stats_panel is not None:
+            self.stats_panel.close()
+
+    def on_stats_panel_closed(self):
+        self.stats_panel = None
+        self.stats_var.set(0)
+        self.metrics.enabled = self.metrics_enabled
 
     def start_auto_translate(self):
-        if self.auto_translate_thread is None or not self.auto_translate_thread.is_alive():
-            self.auto_translate_thread = threading.Thread(target=self.auto_translate_regions, daemon=True)
-            self.auto_translate_thread.start()
+        # パイプラインのスレッドが落ちていたら再起動する
+        if not self.pipeline.is_running():
+            self.pipeline.start()
         self.after(100, self.start_auto_translate)
 
     def highlight_selected_region(self, index):
-        region = self.regions[index]
+        region = self.regions[index].bbox
         if region:
             x1, y1, x2, y2 = region
             highlight_window = Toplevel(self)
@@ -198,7 +337,7 @@ class ScreenTranslator(tk.Tk):
             self.rich_text_area = RichTextArea(self)
             self.rich_text_area.pack(fill=tk.BOTH, expand=True)
 
-        self.rich_text_area.clear_text()
+        self.rich_text_area.set_instant(bool(self.instant_text_var.get()))
         self.rich_text_area.animate_text(translated_text)
 
     def register_region(self, index):
@@ -206,7 +345,7 @@ class ScreenTranslator(tk.Tk):
         selected_region = selection_window.get_selected_region()
 
         if all(selected_region):
-            self.settings.regions[index] = selected_region
+            self.settings.regions[index].bbox = selected_region
             self.settings_controller.save_settings(self.settings)
 
     def get_context(self, index, text):
@@ -229,72 +368,33 @@ class ScreenTranslator(tk.Tk):
         self.translated_text_boxes[i].delete('1.0', tk.END)
         self.translated_text_boxes[i].insert('1.0', translated_text)
         self.translated_text_boxes[i].configure(state="disabled")
-        print(f"選択範囲 {i + 1}: 自動翻訳完了 (間隔: {self.interval_var.get()}秒)")
+        self.snapshot.set_source_text(i, new_text)
 
     def translate_region(self, index):
-        region = self.regions[index]
+        region = self.regions[index].bbox
         if region:
-            ocr_service = PytesseractOCRService()
-            text, success = ocr_service.get_text_from_region(region)
+            ocr_service = get_ocr_service()
+            preprocessor = get_preprocessor(self.regions[index].preprocess)
+            text, success = ocr_service.get_text_from_region(region, preprocessor=preprocessor)
             if success:
                 context_before, context_after = self.get_context(index, text)
-                translated_text = translate_text(text, context_before=context_before, context_after=context_after)
-                self.result_texts[index].delete('1.0', tk.END)
-                self.result_texts[index].insert('1.0', text)
-                self.translated_text_boxes[index].configure(state="normal")
-                self.translated_text_boxes[index].delete('1.0', tk.END)
-                self.translated_text_boxes[index].insert('1.0', translated_text)
-                self.translated_text_boxes[index].configure(state="disabled")
-
-                self.highlight_region(region, translated_text)
-
-            def start_auto_translate(self):
-                if self.auto_translate_thread is None or not self.auto_translate_thread.is_alive():
-                    self.auto_translate_thread = threading.Thread(target=self.auto_translate_regions, daemon=True)
-                    self.auto_translate_thread.start()
-                self.after(100, self.start_auto_translate)
-
-            def update_texts(self, i, new_text, translated_text):
-                self.result_texts[i].delete('1.0', tk.END)
-                self.result_texts[i].insert('1.0', new_text)
-                self.translated_text_boxes[i].configure(state="normal")
-                self.translated_text_boxes[i].delete('1.0', tk.END)
-                self.translated_text_boxes[i].insert('1.0', translated_text)
-                self.translated_text_boxes[i].configure(state="disabled")
-                print(f"選択範囲 {i + 1}: 自動翻訳完了 (間隔: {self.interval_var.get()}秒)")
-
-            def auto_translate_regions(self):
-                last_texts = [""] * 3
-                while True:
-                    with ThreadPoolExecutor() as executor:
-                        futures = []
-                        for i, region in enumerate(self.regions):
-                            if self.auto_translate_vars[i].get() and region:
-                                x1, y1, x2, y2 = region
-                                screenshot = ImageGrab.grab(bbox=(x1, y1, x2, y2))
-                                custom_config = r'--oem 3 --psm 6 -l eng'
-
-                                new_text = pytesseract.image_to_string(screenshot,
-                                                                       config=custom_config).strip().replace("\n", " ")
-
-                                if new_text and new_text != last_texts[i]:
-                                    context_before, context_after = self.get_context(i, new_text)
-                                    future = executor.submit(translate_text, new_text, context_before=context_before,
-                                                             context_after=context_after)
-                                    futures.append((i, new_text, future))
-                                    last_texts[i] = new_text
-                                elif not new_text:
-                                    pass
-                                else:
-                                    pass
-
-                        for i, new_text, future in futures:
-                            translated_text = future.result()
-                            self.after_idle(self.update_texts, i, new_text, translated_text)
-                            self.highlight_region(self.regions[i], translated_text)
-
-                    time.sleep(max(self.interval_var.get(), 5))
+                # 自動翻訳と同じくレート制限と文字数の予算を通す。ボタンで頼んだ翻訳はソフト上限を超えても送る
+                priority = max(self.regions[index].priority, config.TRANSLATION_ESSENTIAL_PRIORITY)
+                future = self.pipeline.translator.submit(text, context_before=context_before,
+                                                         context_after=context_after, priority=priority)
+                future.add_done_callback(lambda f: self.on_manual_translation_done(index, text, f))
+
+    def on_manual_translation_done(self, index, text, future):
+        # 翻訳スレッドから呼ばれるので、表示はUIの更新キューに任せる
+        try:
+            translated_text = future.result()
+        except Exception as e:
+            print(f"選択範囲 {index + 1}: 翻訳失敗: {e}")
+            return
+        self.on_pipeline_result(index, text, translated_text)
 
 if __name__ == "__main__":
+    # OCRワーカー (spawn) はこのファイルを __mp_main__ として読み込み直すので、ここで記録する
+    startup_trace.mark("imported")
     app = ScreenTranslator()
     app.mainloop()
\ No newline at end of file
@@ -1,14 +1,14 @@
 import tkinter as tk
 from tkinter import Toplevel, Canvas
-import ctypes
-from ctypes import wintypes
+
+from platform_support import get_cursor_position, set_dpi_awareness
 
 ACCENT_COLOR = "#007ACC"
 
 class SelectionWindow:
     def __init__(self, parent):
         self.parent = parent
-        self.set_dpi_awareness()
+        set_dpi_awareness()
         self.root = self.create_selection_window()
         self.canvas = self.create_canvas()
         self.rect_id = self.canvas.create_rectangle(0, 0, 0, 0, outline=ACCENT_COLOR, width=2, dash=(4, 4))
@@ -16,16 +16,8 @@ class SelectionWindow:
         self.dragging = False
         self.bind_events()
 
-    def set_dpi_awareness(self):
-        try:
-            ctypes.windll.user32.SetProcessDpiAwarenessContext(ctypes.c_void_p(-4))
-        except AttributeError:
-            ctypes.windll.shcore.SetProcessDpiAwareness(2)
-
     def get_cursor_position(self):
-        point = wintypes.POINT()
-        ctypes.windll.user32.GetCursorPos(ctypes.byref(point))
-        return point.x, point.y
+        return get_cursor_position(self.root)
 
     def create_selection_window(self):
         root = Toplevel(self.parent)
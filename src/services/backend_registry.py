@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import config
+from services.translation_backend import TranslationMissError
+from services.translation_client import TranslationError
+
+
+class CircuitBreaker:
+    # 続けて failure_threshold 回失敗したら reset_timeout 秒は使わない。その後1回だけ試して戻すか決める
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+
+class BackendState:
+    def __init__(self, backend, breaker, window=200):
+        self.backend = backend
+        self.breaker = breaker
+        self.latencies = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.misses = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def p95(self):
+        latencies = sorted(self.latencies)
+        return latencies[int(len(latencies) * 0.95)] if latencies else None
+
+
+class BackendRegistry:
+    # 登録順に試す。先頭が p95 の応答時間を過ぎても返らなければ次のバックエンドにも送り、先に成功した方を使う。
+    # 失敗したバックエンドはサーキットブレーカーで一定時間外す
+    def __init__(self, backends, hedge_delay=None, hedge_delay_min=0.1, hedge_delay_max=5.0, hedge_min_samples=20,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.states = [BackendState(backend, CircuitBreaker(failure_threshold, reset_timeout))
+                       for backend in backends]
+        self.hedge_delay = hedge_delay
+        self.hedge_delay_min = hedge_delay_min
+        self.hedge_delay_max = hedge_delay_max
+        self.hedge_min_samples = hedge_min_samples
+        self.lock = threading.Lock()
+
+    def deadline(self, state):
+        # 十分な計測がたまるまでは上限の値を使う
+        with self.lock:
+            p95 = state.p95() if len(state.latencies) >= self.hedge_min_samples else None
+        delay = self.hedge_delay_max if p95 is None else p95
+        if self.hedge_delay is not None:
+            delay = self.hedge_delay
+        return min(max(delay, self.hedge_delay_min), self.hedge_delay_max)
+
+    def start(self, state, texts, args):
+        # 呼び出しごとにスレッドを立てる。共有のプールでは遅い先頭の呼び出しや負けたヘッジが
+        # ワーカーを埋め、次のヘッジが締め切りに始まらなくなる
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self.call(state, texts, args))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"translation-{state.backend.name}", daemon=True).start()
+        return future
+
+    def call(self, state, texts, args):
+        start = time.perf_counter()
+        try:
+            translations = state.backend.translate(texts, *args)
+        except TranslationMissError:
+            # 訳を持っていないだけで、バックエンドは正常
+            state.breaker.record_success()
+            with self.lock:
+                state.misses += 1
+            raise
+        except Exception:
+            state.breaker.record_failure()
+            with self.lock:
+                state.failures += 1
+            raise
+        state.breaker.record_success()
+        with self.lock:
+            state.latencies.append(time.perf_counter() - start)
+            state.successes += 1
+        return translations
+
+    def translate(self, texts, target_lang="JA", formality="prefer_more", context="", tag_handling=None,
+                  ignore_tags=None):
+        # (訳のリスト, 訳したバックエンド) を返す
+        args = (target_lang, formality, context, tag_handling, ignore_tags)
+        candidates = iter(self.states)
+        running = {}
+        errors = []
+
+        def launch(hedged):
+            for state in candidates:
+                if state.breaker.allow():
+                    if hedged:
+                        with self.lock:
+                            state.hedges += 1
+                    running[self.start(state, texts, args)] = (state, hedged)
+                    return True
+            return False
+
+        if not launch(False):
+            raise TranslationError("No translation backend available")
+        primary = next(iter(running.values()))[0]
+        timeout = self.deadline(primary)
+        while running:
+            done, _ = wait(running, timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # 先頭がまだ返らないので、次のバックエンドにも送る (以降は待ち時間なし)
+                launch(True)
+                timeout = None
+                continue
+            for future in done:
+                state, hedged = running.pop(future)
+                try:
+                    translations = future.result()
+                except Exception as e:
+                    errors.append(f"{state.backend.name}: {e}")
+                    continue
+                if hedged:
+                    with self.lock:
+                        state.hedge_wins += 1
+                # 遅い方はそのまま終わらせ、結果は捨てる (レイテンシとブレーカーには反映される)
+                return translations, state.backend
+            if not running:
+                launch(False)
+        raise TranslationError("; ".join(errors) or "No translation backend available")
+
+    def warm_up(self):
+        for state in self.states:
+            state.backend.warm_up()
+
+    def stats(self):
+        stats = {}
+        for state in self.states:
+            with self.lock:
+                p95 = state.p95()
+                entry = {
+                    "state": state.breaker.state,
+                    "p95_ms": p95 * 1000 if p95 is not None else None,
+                    "successes": state.successes,
+                    "failures": state.failures,
+                    "misses": state.misses,
+                    "hedges": state.hedges,
+                    "hedge_wins": state.hedge_wins,
+                }
+            for key, value in state.backend.stats().items():
+                entry[key] = value
+            stats[state.backend.name] = entry
+        return stats
+
+    def close(self):
+        for state in self.states:
+            state.backend.close()
+
+
+def create_backend(spec):
+    # spec: {"type": "deepl" | "memory" | "mock", "name": ..., その他は各バックエンドの引数}
+    spec = dict(spec)
+    backend_type = spec.pop("type")
+    if backend_type == "deepl":
+        from services.deepl_backend import DeepLBackend
+        return DeepLBackend(**spec)
+    if backend_type == "memory":
+        from services.memory_backend import TranslationMemoryBackend
+        return TranslationMemoryBackend(**spec)
+    if backend_type == "mock":
+        from services.mock_backend import MockBackend
+        return MockBackend(**spec)
+    raise ValueError(f"Unknown translation backend: {backend_type}")
+
+
+def create_backend_registry(specs=None):
+    specs = config.TRANSLATION_BACKENDS if specs is None else specs
+    return BackendRegistry([create_backend(spec) for spec in specs], hedge_delay=config.HEDGE_DELAY,
+                           hedge_delay_min=config.HEDGE_DELAY_MIN, hedge_delay_max=config.HEDGE_DELAY_MAX,
+                           failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+                           reset_timeout=config.BREAKER_RESET_TIMEOUT)
+
+
+_backend_registry = None
+_backend_registry_lock = threading.Lock()
+
+
+def get_backend_registry():
+    global _backend_registry
+    with _backend_registry_lock:
+        if _backend_registry is None:
+            _backend_registry = create_backend_registry()
+        return _backend_registry
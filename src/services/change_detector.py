@@ -0,0 +1,36 @@
+from PIL import Image, ImageChops
+
+
+class ChangeDetector:
+    def __init__(self, threshold=0.0, pixel_tolerance=10, cell=4, min_size=(96, 32), max_size=(480, 120)):
+        # threshold: 変化したセルの割合がこれを超えたらOCRを実行する (0なら1セルでも変われば実行する)
+        # cell: 約 cell px 四方を1セルにする。句読点1つの違いでも1セルは変わる細かさにする
+        # ノイズは pixel_tolerance (セルの明るさの差) で無視する
+        self.threshold = threshold
+        self.pixel_tolerance = pixel_tolerance
+        self.cell = cell
+        self.min_size = min_size
+        self.max_size = max_size
+        self.fingerprints = {}
+        self._lookup = [255 if p > pixel_tolerance else 0 for p in range(256)]
+
+    def fingerprint(self, image):
+        width = min(max(image.width // self.cell, self.min_size[0]), self.max_size[0])
+        height = min(max(image.height // self.cell, self.min_size[1]), self.max_size[1])
+        return image.convert("L").resize((width, height), Image.BOX)
+
+    def difference(self, previous, current):
+        diff = ImageChops.difference(previous, current).point(self._lookup)
+        changed = diff.histogram()[255]
+        return changed / (current.width * current.height)
+
+    def has_changed(self, key, image):
+        current = self.fingerprint(image)
+        previous = self.fingerprints.get(key)
+        # 領域の大きさが変わったら変化とみなす
+        if previous is not None and previous.size == current.size and \
+                self.difference(previous, current) <= self.threshold:
+            return False
+        # 前回OCRしたフレームを基準に比較するため、変化時のみ更新する
+        self.fingerprints[key] = current
+        return True
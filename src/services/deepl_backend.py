@@ -0,0 +1,31 @@
+import config
+from services.translation_backend import TranslationBackend
+from services.translation_client import TranslationClient
+
+DEEPL_PRO_URL = "https://api.deepl.com/v2/translate"
+DEEPL_FREE_URL = "https://api-free.deepl.com/v2/translate"
+
+
+class DeepLBackend(TranslationBackend):
+    def __init__(self, name="deepl", url=None, api_key=None, plan=None, max_retries=None):
+        # plan: "pro" / "free" (url を指定しなければ対応するエンドポイントを使う)
+        self.name = name
+        if url is None:
+            url = {"pro": DEEPL_PRO_URL, "free": DEEPL_FREE_URL}.get(plan, config.DEEPL_API_URL)
+        self.client = TranslationClient(api_key or config.DEEPL_API_KEY, url=url,
+                                        connect_timeout=config.DEEPL_CONNECT_TIMEOUT,
+                                        read_timeout=config.DEEPL_READ_TIMEOUT,
+                                        max_retries=config.DEEPL_MAX_RETRIES if max_retries is None else max_retries)
+
+    def translate(self, texts, target_lang="JA", formality="prefer_more", context="", tag_handling=None,
+                  ignore_tags=None):
+        return self.client.translate(texts, target_lang, formality, context, tag_handling, ignore_tags)
+
+    def warm_up(self):
+        self.client.warm_up()
+
+    def stats(self):
+        return self.client.stats()
+
+    def close(self):
+        self.client.close()
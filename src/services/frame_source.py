@@ -0,0 +1,205 @@
+import asyncio
+import bisect
+import json
+import os
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from io import BytesIO
+
+from PIL import Image
+
+from services.session_recorder import INDEX_SUFFIX, SessionReader
+
+FRAME_EXTENSIONS = (".png", ".bmp", ".jpg", ".jpeg")
+
+
+def union_bbox(regions):
+    x1 = min(region[0] for region in regions)
+    y1 = min(region[1] for region in regions)
+    x2 = max(region[2] for region in regions)
+    y2 = max(region[3] for region in regions)
+    return x1, y1, x2, y2
+
+
+class FrameSource(ABC):
+    finished = False
+    # Falseなら clock / sleep は仮想時間。処理にかかった実時間の分だけ時間が進まない
+    realtime = True
+
+    @abstractmethod
+    def grab(self, bbox):
+        pass
+
+    def clock(self):
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+    def grab_regions(self, regions):
+        # regions: {index: (x1, y1, x2, y2)}
+        # 全領域を含む矩形を1回だけキャプチャし、同じフレームから各領域を切り出す
+        if not regions:
+            return {}
+        ux1, uy1, ux2, uy2 = union_bbox(regions.values())
+        frame = self.grab((ux1, uy1, ux2, uy2))
+        crops = {}
+        for index, (x1, y1, x2, y2) in regions.items():
+            crops[index] = frame.crop((x1 - ux1, y1 - uy1, x2 - ux1, y2 - uy1))
+        return crops
+
+
+class RecordedFrameSource(FrameSource):
+    # 記録済みのフレーム列を再生する。realtime=Falseでは待ち時間を仮想時間で進め、最大速度で再生する
+    def __init__(self, timestamps, realtime=True):
+        self.timestamps = timestamps
+        self.realtime = realtime
+        self.start_time = None
+        self.virtual_time = 0.0
+        self.cached_index = None
+        self.cached_frame = None
+
+    @abstractmethod
+    def load_frame(self, index):
+        pass
+
+    def clock(self):
+        if not self.realtime:
+            return self.virtual_time
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+        return time.monotonic() - self.start_time
+
+    async def sleep(self, seconds):
+        if self.realtime:
+            await asyncio.sleep(seconds)
+        else:
+            self.virtual_time += seconds
+            await asyncio.sleep(0)
+
+    @property
+    def finished(self):
+        return not self.timestamps or self.clock() > self.timestamps[-1]
+
+    def current_frame(self):
+        index = max(bisect.bisect_right(self.timestamps, self.clock()) - 1, 0)
+        if index != self.cached_index:
+            self.cached_frame = self.load_frame(index)
+            self.cached_index = index
+        return self.cached_frame
+
+    def grab(self, bbox):
+        return self.current_frame().crop(bbox)
+
+
+class DirectoryFrameSource(RecordedFrameSource):
+    # ファイル名順の画像を fps で並べる。index.json ({"ファイル名": 秒}) があればその時刻を使う
+    def __init__(self, path, fps=10, realtime=True):
+        names = sorted(name for name in os.listdir(path) if name.lower().endswith(FRAME_EXTENSIONS))
+        index_path = os.path.join(path, "index.json")
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            names = sorted((name for name in names if name in index), key=lambda name: index[name])
+            timestamps = [index[name] for name in names]
+        else:
+            timestamps = [i / fps for i in range(len(names))]
+        super().__init__(timestamps, realtime)
+        self.paths = [os.path.join(path, name) for name in names]
+
+    def load_frame(self, index):
+        with Image.open(self.paths[index]) as image:
+            return image.convert("RGB")
+
+
+class ArchiveFrameSource(RecordedFrameSource):
+    # zipに格納したフレームを再生する。index.json: [{"name": ..., "time": 秒}, ...]
+    def __init__(self, path, realtime=True):
+        self.archive = zipfile.ZipFile(path)
+        entries = json.loads(self.archive.read("index.json"))
+        entries.sort(key=lambda entry: entry["time"])
+        super().__init__([entry["time"] for entry in entries], realtime)
+        self.names = [entry["name"] for entry in entries]
+
+    def load_frame(self, index):
+        with Image.open(BytesIO(self.archive.read(self.names[index]))) as image:
+            return image.convert("RGB")
+
+
+class VideoFrameSource(RecordedFrameSource):
+    # PILで読めるアニメーション画像 (GIF / APNG / WebP) を動画として再生する
+    def __init__(self, path, realtime=True):
+        self.image = Image.open(path)
+        timestamps = []
+        elapsed = 0.0
+        for index in range(getattr(self.image, "n_frames", 1)):
+            self.image.seek(index)
+            timestamps.append(elapsed)
+            elapsed += self.image.info.get("duration", 100) / 1000
+        super().__init__(timestamps, realtime)
+
+    def load_frame(self, index):
+        self.image.seek(index)
+        return self.image.convert("RGB")
+
+
+class SessionFrameSource(RecordedFrameSource):
+    # SessionRecorderの記録を再生する。記録は変化した領域だけなので、領域ごとに直近のフレームを返す
+    # max_gap: アプリの再起動などで空いた記録の間隔をこの秒数に縮める
+    def __init__(self, path, realtime=True, max_gap=5.0):
+        self.reader = SessionReader(path)
+        self.entries = self.reader.frames()
+        timestamps = []
+        elapsed = 0.0
+        for n, entry in enumerate(self.entries):
+            if n:
+                elapsed += min(entry["time"] - self.entries[n - 1]["time"], max_gap)
+            timestamps.append(elapsed)
+        super().__init__(timestamps, realtime)
+        self.region_frames = {}
+        for entry, timestamp in zip(self.entries, timestamps):
+            times, entries = self.region_frames.setdefault(entry["region"], ([], []))
+            times.append(timestamp)
+            entries.append(entry)
+        self.loaded = {}
+
+    def regions(self):
+        return self.reader.regions()
+
+    def load_frame(self, index):
+        return self.reader.load_frame(self.entries[index])
+
+    def grab(self, bbox):
+        raise NotImplementedError("記録された領域ごとのフレームしかありません")
+
+    def grab_regions(self, regions):
+        now = self.clock()
+        crops = {}
+        for index in regions:
+            if index not in self.region_frames:
+                continue
+            times, entries = self.region_frames[index]
+            position = bisect.bisect_right(times, now) - 1
+            if position < 0:
+                continue
+            entry = entries[position]
+            cached = self.loaded.get(index)
+            if cached is None or cached[0] is not entry:
+                cached = (entry, self.reader.load_frame(entry))
+                self.loaded[index] = cached
+            crops[index] = cached[1]
+        return crops
+
+
+def open_frame_source(source, fps=10, realtime=True):
+    if source == "screen":
+        from services.screen_capture import ScreenCapture
+        return ScreenCapture()
+    if os.path.isdir(source) and any(name.endswith(INDEX_SUFFIX) for name in os.listdir(source)):
+        return SessionFrameSource(source, realtime)
+    if os.path.isdir(source):
+        return DirectoryFrameSource(source, fps, realtime)
+    if zipfile.is_zipfile(source):
+        return ArchiveFrameSource(source, realtime)
+    return VideoFrameSource(source, realtime)
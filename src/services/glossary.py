@@ -0,0 +1,136 @@
+import html
+import os
+import re
+import threading
+import time
+
+import config
+
+# ノベルゲームのハート記号はOCRでこれらの記号に化けるので、既定では 💕 に置き換えて翻訳させない
+SYMBOLS = ["@", "®", "©", "¥", "™"]
+SYMBOL_TARGET = "💕"
+PLACEHOLDER_TAG = "x"
+RELOAD_CHECK_INTERVAL = 1.0
+
+_PLACEHOLDER = re.compile(r'<x id="(\d+)"\s*(?:/>|>.*?</x>)', re.S)
+_STRAY_TAG = re.compile(r"</?x\b[^>]*>")
+
+
+def build_trie_pattern(terms):
+    # 共通の接頭辞をまとめた1つの正規表現にする。語の数が増えても1文字ずつの分岐をたどるだけで済む
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_to_pattern(trie)
+
+
+def _trie_to_pattern(node):
+    children = [(char, child) for char, child in sorted(node.items()) if char]
+    if not children:
+        return ""
+    leaves = [char for char, child in children if list(child) == [""]]
+    branches = [re.escape(char) + _trie_to_pattern(child) for char, child in children if list(child) != [""]]
+    if len(leaves) == 1:
+        branches.append(re.escape(leaves[0]))
+    elif leaves:
+        branches.append("[" + "".join(re.escape(char) for char in leaves) + "]")
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # ここで終わる語もあるので続きは任意にする (貪欲なので長い語が優先される)
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+class Glossary:
+    # entries: [(原文の語, 訳語)]。訳語がNoneなら原文のまま残す
+    # symbol_target: SYMBOLS の訳語 (Noneなら記号のまま)。用語集に同じ記号があればそちらが優先
+    def __init__(self, entries=(), symbol_target=SYMBOL_TARGET):
+        self.entries = {}
+        for source, target in list(entries) + [(symbol, symbol_target) for symbol in SYMBOLS]:
+            if source:
+                self.entries.setdefault(source, target)
+        # 英数字で始まり英数字で終わる語は、単語の途中に一致しないようにする
+        words = [term for term in self.entries if term[0].isalnum() and term[-1].isalnum()]
+        others = [term for term in self.entries if not (term[0].isalnum() and term[-1].isalnum())]
+        parts = []
+        if words:
+            parts.append(r"(?<!\w)" + build_trie_pattern(words) + r"(?!\w)")
+        if others:
+            parts.append(build_trie_pattern(others))
+        self.pattern = re.compile("|".join(parts))
+
+    def protect(self, text):
+        # 語をタグで囲んだXMLにする。DeepLには ignore_tags で翻訳させない
+        values = []
+        parts = []
+        position = 0
+        for match in self.pattern.finditer(text):
+            target = self.entries[match.group()]
+            value = match.group() if target is None else target
+            parts.append(html.escape(text[position:match.start()], quote=False))
+            parts.append(f'<{PLACEHOLDER_TAG} id="{len(values)}">{html.escape(value, quote=False)}</{PLACEHOLDER_TAG}>')
+            values.append(value)
+            position = match.end()
+        parts.append(html.escape(text[position:], quote=False))
+        return "".join(parts), values
+
+    def restore(self, translated, values):
+        parts = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(translated):
+            parts.append(self.unescape(translated[position:match.start()]))
+            index = int(match.group(1))
+            if index < len(values):
+                parts.append(values[index])
+            position = match.end()
+        parts.append(self.unescape(translated[position:]))
+        return "".join(parts)
+
+    def unescape(self, text):
+        return html.unescape(_STRAY_TAG.sub("", text))
+
+
+def read_glossary(path):
+    # 1行に「原文<TAB>訳語」。訳語を省略した語は原文のまま残す。# で始まる行はコメント
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            source, _, target = line.partition("\t")
+            entries.append((source.strip(), target.strip() or None))
+    return entries
+
+
+_glossary = None
+_glossary_mtime = None
+_glossary_checked = 0.0
+_glossary_lock = threading.Lock()
+
+
+def get_glossary():
+    # 用語集ファイルが更新されたら作り直す (確認は RELOAD_CHECK_INTERVAL 秒に1回)
+    global _glossary, _glossary_mtime, _glossary_checked
+    with _glossary_lock:
+        now = time.monotonic()
+        if _glossary is not None and now - _glossary_checked < RELOAD_CHECK_INTERVAL:
+            return _glossary
+        _glossary_checked = now
+        try:
+            mtime = os.stat(config.GLOSSARY_PATH).st_mtime_ns if config.GLOSSARY_PATH else None
+        except OSError:
+            mtime = None
+        if _glossary is None or mtime != _glossary_mtime:
+            try:
+                _glossary = Glossary(read_glossary(config.GLOSSARY_PATH) if mtime is not None else (),
+                                     config.GLOSSARY_SYMBOL_TARGET)
+            except (OSError, UnicodeDecodeError) as e:
+                print("Failed to load glossary:", e)
+                if _glossary is None:
+                    _glossary = Glossary(symbol_target=config.GLOSSARY_SYMBOL_TARGET)
+            _glossary_mtime = mtime
+        return _glossary
@@ -0,0 +1,25 @@
+import html
+
+from services.glossary import get_glossary
+from services.translation_backend import TranslationBackend, TranslationMissError
+from services.translation_memory import get_translation_memory
+
+
+class TranslationMemoryBackend(TranslationBackend):
+    # APIを使わず、翻訳メモリにある同じ原文の訳を文脈を問わず返す。1つでもなければ失敗する
+    cache_results = False
+
+    def __init__(self, name="memory"):
+        self.name = name
+
+    def translate(self, texts, target_lang="JA", formality="prefer_more", context="", tag_handling=None,
+                  ignore_tags=None):
+        memory = get_translation_memory()
+        translations = []
+        for text in texts:
+            source = get_glossary().unescape(text) if tag_handling == "xml" else text
+            translation = memory.get_any_context(source, target_lang, formality)
+            if translation is None:
+                raise TranslationMissError(f"Not in translation memory: {source}")
+            translations.append(html.escape(translation, quote=False) if tag_handling == "xml" else translation)
+        return translations
@@ -0,0 +1,176 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+import config
+
+# 0.05ms から約2分までを25%刻みで区切る
+HISTOGRAM_BOUNDS = []
+_bound = 0.05
+while _bound < 120000:
+    HISTOGRAM_BOUNDS.append(_bound)
+    _bound *= 1.25
+
+
+class Histogram:
+    # 固定の対数バケットに数えるだけなので、記録のコストは二分探索1回分
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(HISTOGRAM_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        # バケットの上限を返すので、実際の値より最大25%大きく見積もる
+        if not self.count:
+            return None
+        rank = self.count * p / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(HISTOGRAM_BOUNDS):
+                    return min(HISTOGRAM_BOUNDS[index], self.max)
+                return self.max
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    # 段階ごと・領域ごとの所要時間 (ms) とカウンタを集める。無効な間は何も記録しない
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.sources = {}
+        self.started_at = time.time()
+
+    def observe(self, stage, ms, region=None):
+        if not self.enabled:
+            return
+        key = (stage, region)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.record(ms)
+
+    def increment(self, name, value=1, region=None):
+        if not self.enabled:
+            return
+        key = (name, region)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_source(self, name, stats):
+        # OCRキャッシュや翻訳クライアントなど、自前で統計を持つものはスナップショット時に読む
+        self.sources[name] = stats
+
+    def snapshot(self):
+        with self.lock:
+            stages = {}
+            totals = {}
+            for (stage, region), histogram in self.histograms.items():
+                stages.setdefault(stage, {})[str(region) if region is not None else "-"] = histogram.summary()
+                total = totals.setdefault(stage, Histogram())
+                total.merge(histogram)
+            for stage, total in totals.items():
+                stages[stage]["all"] = total.summary()
+            counters = {}
+            for (name, region), value in self.counters.items():
+                counter = counters.setdefault(name, {"total": 0})
+                counter["total"] += value
+                if region is not None:
+                    counter[str(region)] = value
+            started_at = self.started_at
+        sources = {}
+        for name, stats in list(self.sources.items()):
+            try:
+                sources[name] = stats()
+            except Exception as e:
+                sources[name] = {"error": str(e)}
+        return {
+            "enabled": self.enabled,
+            "time": time.time(),
+            "uptime": time.time() - started_at,
+            "stages": stages,
+            "counters": counters,
+            "sources": sources,
+        }
+
+    def dump(self, path):
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+
+class MetricsDumper:
+    # 一定間隔でスナップショットをJSONに書き出す
+    def __init__(self, metrics, path, interval=10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            self.metrics.dump(self.path)
+        except OSError as e:
+            print("Failed to dump metrics:", e)
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.write()
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(enabled=config.METRICS_ENABLED)
+        return _metrics
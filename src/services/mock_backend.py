@@ -0,0 +1,22 @@
+import random
+import time
+
+from services.translation_backend import TranslationBackend
+from services.translation_client import TranslationError
+
+
+class MockBackend(TranslationBackend):
+    # ネットワークを使わない動作確認・計測用。"[JA] 原文" のように返す
+    def __init__(self, name="mock", latency=0.05, jitter=0.0, error_rate=0.0, seed=None):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+    def translate(self, texts, target_lang="JA", formality="prefer_more", context="", tag_handling=None,
+                  ignore_tags=None):
+        time.sleep(max(self.latency + self.random.uniform(-self.jitter, self.jitter), 0))
+        if self.random.random() < self.error_rate:
+            raise TranslationError("Mock backend error")
+        return [f"[{target_lang}] {text}" for text in texts]
@@ -0,0 +1,151 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageChops
+
+ENTRY_OVERHEAD_BYTES = 256
+FILE_VERSION = 2
+
+
+_GRADIENT_LOOKUP = [255 if p > 8 else 0 for p in range(256)]
+
+
+def gradient_bitmap(image, cell=2):
+    # 縦横の明暗差分の向き。文字を区別できるよう一般的なdHashより細かい格子
+    # (約 cell px 四方) を使い、平坦な背景のノイズでビットが揺れないよう小さな差は無視する
+    width = min(max(image.width // cell, 32), 320)
+    height = min(max(image.height // cell, 8), 80)
+    small = image.convert("L").resize((width + 1, height + 1), Image.BOX)
+    base = small.crop((0, 0, width, height))
+    right = small.crop((1, 0, width + 1, height))
+    below = small.crop((0, 1, width, height + 1))
+    return b"".join(ImageChops.subtract(a, b).point(_GRADIENT_LOOKUP).convert("1").tobytes()
+                    for a, b in ((base, right), (right, base), (base, below), (below, base)))
+
+
+def entry_size(cache_key, text, bitmap):
+    bucket, digest = cache_key
+    size = ENTRY_OVERHEAD_BYTES + len(text.encode()) + len(bucket[0]) + len(digest)
+    return size + (len(bitmap) if bitmap is not None else 0)
+
+
+class OCRCache:
+    # キーは差分ビットマップのダイジェスト (16バイト)。
+    # max_distance: ビットマップ全体で許容するハミング距離。0より大きいときだけビットマップ (最大12.8KB) も持つ
+    def __init__(self, max_distance=0, max_bytes=8 * 1024 * 1024):
+        self.max_distance = max_distance
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.buckets = {}
+        self.size_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.ocr_count = 0
+        self.ocr_ms_total = 0.0
+        self.saved_ms = 0.0
+        # 読み込みが終わるまで (失敗したときはずっと) 保存しない。途中の内容でファイルを上書きしないため
+        self.loaded = threading.Event()
+
+    def make_bucket(self, image, steps=None):
+        # 前処理の設定と画像サイズが同じものだけを比較対象にする
+        return json.dumps(steps), image.width, image.height
+
+    def get(self, image, steps=None):
+        bucket = self.make_bucket(image, steps)
+        bitmap = gradient_bitmap(image)
+        digest = hashlib.blake2b(bitmap, digest_size=16).digest()
+        if self.max_distance <= 0:
+            bitmap = None
+        with self.lock:
+            key = (bucket, digest)
+            if key not in self.entries and bitmap is not None:
+                key = None
+                value = int.from_bytes(bitmap, "big")
+                for candidate, candidate_bitmap in self.buckets.get(bucket, {}).items():
+                    if candidate_bitmap is not None and \
+                            (int.from_bytes(candidate_bitmap, "big") ^ value).bit_count() <= self.max_distance:
+                        key = (bucket, candidate)
+                        break
+            if key is None or key not in self.entries:
+                self.misses += 1
+                return None, (bucket, digest, bitmap)
+            self.entries.move_to_end(key)
+            self.hits += 1
+            if self.ocr_count:
+                self.saved_ms += self.ocr_ms_total / self.ocr_count
+            return self.entries[key], (bucket, digest, bitmap)
+
+    def put(self, cache_key, text, ocr_ms=None):
+        bucket, digest, bitmap = cache_key
+        key = (bucket, digest)
+        with self.lock:
+            if ocr_ms is not None:
+                self.ocr_count += 1
+                self.ocr_ms_total += ocr_ms
+            if key in self.entries:
+                self.size_bytes -= entry_size(key, self.entries[key], self.buckets[bucket][digest])
+            self.entries[key] = text
+            self.entries.move_to_end(key)
+            self.buckets.setdefault(bucket, {})[digest] = bitmap
+            self.size_bytes += entry_size(key, text, bitmap)
+            while self.size_bytes > self.max_bytes and self.entries:
+                old_key, old_text = self.entries.popitem(last=False)
+                old_bucket, old_digest = old_key
+                bitmaps = self.buckets[old_bucket]
+                self.size_bytes -= entry_size(old_key, old_text, bitmaps.pop(old_digest))
+                if not bitmaps:
+                    del self.buckets[old_bucket]
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "saved_ms": self.saved_ms,
+                "entries": len(self.entries),
+                "size_bytes": self.size_bytes,
+            }
+
+    def save(self, path):
+        if not self.loaded.is_set():
+            print("OCR cache is not loaded; skipped saving")
+            return False
+        with self.lock:
+            entries = []
+            for (bucket, digest), text in self.entries.items():
+                bitmap = self.buckets[bucket][digest]
+                entries.append([bucket[0], bucket[1], bucket[2], digest.hex(),
+                                base64.b64encode(bitmap).decode() if bitmap is not None else None, text])
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": FILE_VERSION, "entries": entries}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return True
+
+    def load(self, path):
+        if not os.path.exists(path):
+            self.loaded.set()
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # 古い形式のファイルは読み捨てる
+            if isinstance(data, dict) and data.get("version") == FILE_VERSION:
+                for steps_key, width, height, digest, bitmap, text in data["entries"]:
+                    # ビットマップがない (許容距離0で保存した / 今は0) エントリは完全一致だけに使う
+                    if bitmap is not None and self.max_distance > 0:
+                        bitmap = base64.b64decode(bitmap)
+                    else:
+                        bitmap = None
+                    self.put(((steps_key, width, height), bytes.fromhex(digest), bitmap), text)
+        except (OSError, ValueError, TypeError) as e:
+            print("Failed to load OCR cache:", e)
+            return
+        self.loaded.set()
@@ -0,0 +1,28 @@
+import threading
+
+import config
+
+_ocr_service = None
+_ocr_service_lock = threading.Lock()
+
+
+def create_ocr_service():
+    # OCRエンジンの読み込みは重いので、最初に使うときまで遅らせる。
+    # tesserocr がないか、エンジンを初期化できなければ (学習データがないなど) pytesseract を使う
+    try:
+        from services.tesserocr_ocr_service import TesserocrOCRService
+        return TesserocrOCRService(tessdata_path=config.TESSDATA_PATH)
+    except ImportError:
+        pass
+    except RuntimeError as e:
+        print("Failed to initialize tesserocr, falling back to pytesseract:", e)
+    from services.pytesseract_ocr_service import PytesseractOCRService
+    return PytesseractOCRService()
+
+
+def get_ocr_service():
+    global _ocr_service
+    with _ocr_service_lock:
+        if _ocr_service is None:
+            _ocr_service = create_ocr_service()
+        return _ocr_service
@@ -1,6 +1,8 @@
+import time
 from abc import ABC, abstractmethod
 from typing import Tuple
-from PIL import ImageGrab
+
+from services.metrics import get_metrics
 
 class OCRService(ABC):
     @abstractmethod
@@ -15,10 +17,24 @@ class OCRService(ABC):
     def postprocess_text(self, text):
         pass
 
-    def get_text_from_region(self, region) -> Tuple[str, bool]:
+    def capture_region(self, region):
+        from PIL import ImageGrab
         x1, y1, x2, y2 = region
-        screenshot = ImageGrab.grab(bbox=(x1, y1, x2, y2))
-        preprocessed_image = self.preprocess_image(screenshot)
+        return ImageGrab.grab(bbox=(x1, y1, x2, y2))
+
+    def get_text_from_region(self, region, image=None, preprocessor=None) -> Tuple[str, bool]:
+        start = time.perf_counter()
+        if image is None:
+            image = self.capture_region(region)
+        result = self.get_text_from_image(image, preprocessor)
+        get_metrics().observe("manual_ocr", (time.perf_counter() - start) * 1000)
+        return result
+
+    def get_text_from_image(self, screenshot, preprocessor=None, timings=None) -> Tuple[str, bool]:
+        if preprocessor is not None:
+            preprocessed_image = preprocessor.process(screenshot, timings)
+        else:
+            preprocessed_image = self.preprocess_image(screenshot)
         text = self.extract_text_from_image(preprocessed_image)
         processed_text = self.postprocess_text(text)
         success = bool(processed_text)
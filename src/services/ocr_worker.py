@@ -0,0 +1,45 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+from services.image_preprocessor import ImagePreprocessor
+from services.ocr_factory import get_ocr_service
+
+_preprocessors = {}
+
+
+def get_preprocessor(steps):
+    key = json.dumps(steps)
+    preprocessor = _preprocessors.get(key)
+    if preprocessor is None:
+        preprocessor = _preprocessors[key] = ImagePreprocessor.from_config(steps)
+    return preprocessor
+
+
+def init_ocr_worker():
+    # ワーカープロセスごとにOCRエンジンを1度だけ読み込む
+    get_ocr_service()
+
+
+def ocr_image(image, steps=None):
+    # steps: 領域ごとの前処理設定 (Noneなら既定の前処理)
+    # ワーカープロセスのメトリクスは見えないので、前処理の段階ごとの所要時間 (ms) も返す
+    timings = {}
+    text, success = get_ocr_service().get_text_from_image(image, get_preprocessor(steps), timings)
+    return text, success, timings
+
+
+def ocr_worker_count():
+    return config.OCR_MAX_WORKERS or os.cpu_count() or 1
+
+
+def create_ocr_executor():
+    return ProcessPoolExecutor(max_workers=ocr_worker_count(), initializer=init_ocr_worker)
+
+
+def warm_up_ocr_executor(executor):
+    # ワーカープロセスは最初のタスクで起動するので、空のタスクを投げて起動とエンジンの読み込みを済ませる
+    futures = [executor.submit(os.getpid) for _ in range(ocr_worker_count())]
+    for future in futures:
+        future.result()
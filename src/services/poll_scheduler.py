@@ -0,0 +1,51 @@
+import time
+
+
+class AdaptivePollScheduler:
+    # 変化中の領域は min_interval で監視し、変化がなければ max_interval まで間隔を伸ばす
+    def __init__(self, min_interval=0.15, max_interval=5.0, backoff=1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.intervals = {}
+        self.next_due = {}
+        self.policies = {}
+
+    def set_policy(self, key, min_interval=None, max_interval=None):
+        # 領域ごとに監視間隔の上下限を上書きする (Noneなら全体の設定)
+        self.policies[key] = (min_interval, max_interval)
+
+    def due(self, keys, now=None):
+        if now is None:
+            now = time.monotonic()
+        return [key for key in keys if self.next_due.get(key, now) <= now]
+
+    def record(self, key, active, now=None):
+        if now is None:
+            now = time.monotonic()
+        min_interval, max_interval = self.policies.get(key, (None, None))
+        min_interval = min_interval or self.min_interval
+        max_interval = max(max_interval or self.max_interval, min_interval)
+        if active:
+            interval = min_interval
+        else:
+            interval = min(self.intervals.get(key, min_interval) * self.backoff, max_interval)
+        self.intervals[key] = interval
+        self.next_due[key] = now + interval
+
+    def wait_time(self, keys, default, now=None):
+        due_times = [self.next_due[key] for key in keys if key in self.next_due]
+        if len(due_times) < len(keys):
+            return 0
+        if not due_times:
+            return default
+        if now is None:
+            now = time.monotonic()
+        return min(max(min(due_times) - now, 0), default)
+
+    def retain(self, keys):
+        for key in list(self.next_due):
+            if key not in keys:
+                del self.next_due[key]
+                self.intervals.pop(key, None)
+                self.policies.pop(key, None)
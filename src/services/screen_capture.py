@@ -0,0 +1,8 @@
+from services.frame_source import FrameSource
+
+
+class ScreenCapture(FrameSource):
+    # 実際の画面から取得するフレームソース
+    def grab(self, bbox):
+        from PIL import ImageGrab
+        return ImageGrab.grab(bbox=bbox)
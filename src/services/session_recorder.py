@@ -0,0 +1,162 @@
+import json
+import os
+import queue
+import threading
+import time
+from io import BytesIO
+
+from PIL import Image
+
+DATA_SUFFIX = ".bin"
+INDEX_SUFFIX = ".jsonl"
+
+
+def list_segments(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(name[:-len(INDEX_SUFFIX)]) for name in os.listdir(directory)
+                  if name.endswith(INDEX_SUFFIX) and name[:-len(INDEX_SUFFIX)].isdigit())
+
+
+def segment_path(directory, segment, suffix):
+    return os.path.join(directory, f"{segment:06d}{suffix}")
+
+
+class SessionRecorder:
+    # 変化した領域のフレーム(PNG)・OCR結果・翻訳結果を追記専用のセグメントに記録する
+    # セグメントは .bin (画像データ) と .jsonl (索引) の組で、合計が max_bytes を超えたら古いものから削除する
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, segment_bytes=16 * 1024 * 1024, queue_size=256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.segment_sizes = {}
+        for segment in list_segments(directory):
+            self.segment_sizes[segment] = sum(os.path.getsize(segment_path(directory, segment, suffix))
+                                              for suffix in (DATA_SUFFIX, INDEX_SUFFIX)
+                                              if os.path.exists(segment_path(directory, segment, suffix)))
+        self.segment = max(self.segment_sizes, default=0)
+        self.data_file = None
+        self.index_file = None
+        self.dropped = 0
+        # 記録でパイプラインを遅らせないよう、PNGへの変換と書き込みは専用スレッドで行う
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        self.enqueue({"type": "session"})
+
+    def enqueue(self, entry, image=None):
+        entry["time"] = time.time()
+        try:
+            self.queue.put_nowait((entry, image))
+        except queue.Full:
+            self.dropped += 1
+
+    def record_frame(self, region, bbox, image):
+        self.enqueue({"type": "frame", "region": region, "bbox": list(bbox)}, image)
+
+    def record_ocr(self, region, text, ocr_ms=None):
+        self.enqueue({"type": "ocr", "region": region, "text": text, "ocr_ms": ocr_ms})
+
+    def record_translation(self, region, source_text, translated_text):
+        self.enqueue({"type": "translation", "region": region,
+                      "source_text": source_text, "translated_text": translated_text})
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            entry, image = item
+            try:
+                self.write(entry, image)
+            except Exception as e:
+                print("Failed to record session:", e)
+        self.close_segment()
+
+    def write(self, entry, image):
+        if self.data_file is None or self.segment_sizes[self.segment] >= self.segment_bytes:
+            self.open_segment()
+        written = 0
+        if image is not None:
+            buffer = BytesIO()
+            image.save(buffer, format="PNG", compress_level=1)
+            data = buffer.getvalue()
+            entry["offset"] = self.data_file.tell()
+            entry["length"] = len(data)
+            self.data_file.write(data)
+            self.data_file.flush()
+            written += len(data)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        self.index_file.write(line)
+        self.index_file.flush()
+        written += len(line.encode())
+        self.segment_sizes[self.segment] += written
+
+    def open_segment(self):
+        self.close_segment()
+        self.segment += 1
+        self.segment_sizes[self.segment] = 0
+        self.data_file = open(segment_path(self.directory, self.segment, DATA_SUFFIX), "ab")
+        self.index_file = open(segment_path(self.directory, self.segment, INDEX_SUFFIX), "a", encoding="utf-8")
+        self.rotate()
+
+    def close_segment(self):
+        if self.data_file is not None:
+            self.data_file.close()
+            self.index_file.close()
+            self.data_file = None
+            self.index_file = None
+
+    def rotate(self):
+        # 書き込み中のセグメントは残す
+        while sum(self.segment_sizes.values()) > self.max_bytes and len(self.segment_sizes) > 1:
+            oldest = min(self.segment_sizes)
+            for suffix in (DATA_SUFFIX, INDEX_SUFFIX):
+                path = segment_path(self.directory, oldest, suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+            del self.segment_sizes[oldest]
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+class SessionReader:
+    # 記録の索引を読み込み、フレームを offset から直接読み出す
+    def __init__(self, directory):
+        self.directory = directory
+        self.entries = []
+        for segment in list_segments(directory):
+            with open(segment_path(directory, segment, INDEX_SUFFIX), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 書き込み途中で終了した行は読み飛ばす
+                        continue
+                    entry["segment"] = segment
+                    self.entries.append(entry)
+        self.entries.sort(key=lambda entry: entry["time"])
+
+    def frames(self, region=None):
+        return [entry for entry in self.entries
+                if entry["type"] == "frame" and (region is None or entry["region"] == region)]
+
+    def translations(self):
+        return [entry for entry in self.entries if entry["type"] == "translation"]
+
+    def regions(self):
+        # 領域ごとに最後に記録された位置
+        bboxes = {}
+        for entry in self.frames():
+            bboxes[entry["region"]] = tuple(entry["bbox"])
+        return bboxes
+
+    def load_frame(self, entry):
+        with open(segment_path(self.directory, entry["segment"], DATA_SUFFIX), "rb") as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        with Image.open(BytesIO(data)) as image:
+            return image.convert("RGB")
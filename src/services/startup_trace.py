@@ -0,0 +1,19 @@
+import json
+import os
+import time
+
+# 起動時間の計測用 (startup_benchmark.py が環境変数で指定する)。未指定なら何もしない
+TRACE_PATH = os.environ.get("NST_STARTUP_TRACE")
+EXIT_AFTER = os.environ.get("NST_STARTUP_EXIT_AFTER")
+
+_marked = set()
+
+
+def mark(event):
+    # 各イベントの最初の1回だけを記録し、計測を終える地点ならTrueを返す
+    if not TRACE_PATH or event in _marked:
+        return False
+    _marked.add(event)
+    with open(TRACE_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"event": event, "time": time.time()}) + "\n")
+    return event == EXIT_AFTER
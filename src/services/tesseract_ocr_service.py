@@ -0,0 +1,15 @@
+from services.image_preprocessor import ImagePreprocessor
+from services.ocr_service import OCRService
+
+
+class TesseractOCRService(OCRService):
+    # pytesseract / tesserocr で共通の前処理と後処理。エンジンのモジュールはここでは読み込まない
+    def __init__(self, preprocessor=None):
+        self.preprocessor = preprocessor or ImagePreprocessor.from_config()
+
+    def preprocess_image(self, image):
+        return self.preprocessor.process(image)
+
+    def postprocess_text(self, text):
+        processed_text = text.strip().replace("\n", " ")
+        return processed_text
@@ -0,0 +1,25 @@
+import threading
+
+from tesserocr import OEM, PSM, PyTessBaseAPI
+
+from services.tesseract_ocr_service import TesseractOCRService
+
+
+class TesserocrOCRService(TesseractOCRService):
+    # tesseractのプロセスを毎回起動せず、学習データを読み込んだエンジンを使い回す
+    def __init__(self, lang="eng", tessdata_path=None, preprocessor=None):
+        super().__init__(preprocessor)
+        kwargs = {"lang": lang, "psm": PSM.SINGLE_BLOCK, "oem": OEM.DEFAULT}
+        if tessdata_path:
+            kwargs["path"] = tessdata_path
+        self.api = PyTessBaseAPI(**kwargs)
+        self.lock = threading.Lock()
+
+    def extract_text_from_image(self, image):
+        with self.lock:
+            self.api.SetImage(image)
+            return self.api.GetUTF8Text()
+
+    def close(self):
+        with self.lock:
+            self.api.End()
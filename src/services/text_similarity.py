@@ -0,0 +1,58 @@
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+# OCRで取り違えやすい文字を同じ文字に寄せる
+_CONFUSABLES = str.maketrans({"I": "l", "|": "l", "1": "l", "!": "l", "0": "o", "O": "o"})
+
+
+def normalize_text(text):
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def comparison_key(text):
+    text = normalize_text(text).translate(_CONFUSABLES).casefold()
+    return "".join(c for c in text if not unicodedata.category(c).startswith(("P", "Z")))
+
+
+def bounded_levenshtein(a, b, max_distance):
+    # |i - j| <= max_distance の帯だけを計算する。超えた場合は max_distance + 1 を返す
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+    limit = max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [limit] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        start = max(1, i - max_distance)
+        end = min(len(b), i + max_distance)
+        row_min = current[0]
+        char_a = a[i - 1]
+        for j in range(start, end + 1):
+            cost = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost if cost < limit else limit
+            if cost < row_min:
+                row_min = cost
+        if row_min >= limit:
+            return limit
+        previous = current
+    return previous[len(b)]
+
+
+def is_same_text(a, b, max_ratio=0.05):
+    # 文字数の max_ratio 以下の違いはOCRの揺れとみなす
+    key_a = comparison_key(a)
+    key_b = comparison_key(b)
+    if key_a == key_b:
+        return True
+    max_distance = int(max(len(key_a), len(key_b)) * max_ratio)
+    if max_distance == 0:
+        return False
+    return bounded_levenshtein(key_a, key_b, max_distance) <= max_distance
@@ -0,0 +1,30 @@
+import time
+
+
+class TextStabilizer:
+    # 文字送り演出の途中でOCRしないよう、画素の変化が settle_time 秒止まるまで待つ
+    def __init__(self, settle_time=0.3):
+        self.settle_time = settle_time
+        self.changed_at = {}
+
+    def observe(self, key, changed, now=None):
+        if now is None:
+            now = time.monotonic()
+        if changed:
+            if self.settle_time <= 0:
+                return True
+            self.changed_at[key] = now
+            return False
+        changed_at = self.changed_at.get(key)
+        if changed_at is not None and now - changed_at >= self.settle_time:
+            del self.changed_at[key]
+            return True
+        return False
+
+    def is_settling(self, key):
+        return key in self.changed_at
+
+    def retain(self, keys):
+        for key in list(self.changed_at):
+            if key not in keys:
+                del self.changed_at[key]
@@ -0,0 +1,30 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from services.translation_client import TranslationError
+
+
+class TranslationMissError(TranslationError):
+    # 障害ではなく、訳を持っていないだけ (翻訳メモリなど)
+    pass
+
+
+class TranslationBackend(ABC):
+    # texts は用語集のプレースホルダを含むXML (tag_handling="xml" のとき)。失敗したら TranslationError を送出する
+    name = "backend"
+    # Falseなら結果を翻訳メモリに残さない (別の文脈の訳を返すことがあるもの)
+    cache_results = True
+
+    @abstractmethod
+    def translate(self, texts, target_lang="JA", formality="prefer_more", context="", tag_handling=None,
+                  ignore_tags=None) -> List[str]:
+        pass
+
+    def warm_up(self):
+        pass
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
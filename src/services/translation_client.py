@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+
+class TranslationError(Exception):
+    pass
+
+
+class TranslationClient:
+    def __init__(self, api_key, url="https://api.deepl.com/v2/translate", connect_timeout=3.05, read_timeout=10,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, retry_after_max=60.0, pool_size=4):
+        self.api_key = api_key
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        # requestsの読み込みは起動時間の大半を占めるので、クライアントを作るときまで遅らせる
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.exceptions = (requests.ConnectionError, requests.Timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Authorization"] = f"DeepL-Auth-Key {api_key}"
+        self.stats_lock = threading.Lock()
+        self.request_count = 0
+        self.retry_count = 0
+        self.character_count = 0
+
+    def translate(self, texts, target_lang="JA", formality="prefer_more", context="", tag_handling=None,
+                  ignore_tags=None):
+        params = {
+            "text": list(texts),
+            "target_lang": target_lang,
+            "split_sentences": "1",
+            "formality": formality
+        }
+        if context:
+            # contextは翻訳も課金もされない
+            params["context"] = context
+        if tag_handling:
+            params["tag_handling"] = tag_handling
+        if ignore_tags:
+            params["ignore_tags"] = ignore_tags
+        response = self.post(params)
+        try:
+            translations = [t['text'] for t in response.json()['translations']]
+        except (ValueError, KeyError, TypeError) as e:
+            raise TranslationError(f"Unexpected response: {response.text}") from e
+        if len(translations) != len(params["text"]):
+            raise TranslationError(f"Expected {len(params['text'])} translations, got {len(translations)}")
+        return translations
+
+    def post(self, params):
+        attempt = 0
+        characters = sum(len(text) for text in params["text"])
+        while True:
+            with self.stats_lock:
+                self.request_count += 1
+                self.retry_count += attempt > 0
+                self.character_count += characters
+            try:
+                response = self.session.post(self.url, data=params, timeout=self.timeout)
+            except self.exceptions as e:
+                if attempt >= self.max_retries:
+                    raise TranslationError(str(e)) from e
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code == 200:
+                return response
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                raise TranslationError(f"{response.status_code}: {response.text}")
+            time.sleep(self.retry_after(response) or self.backoff(attempt))
+            attempt += 1
+
+    def backoff(self, attempt):
+        # full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def retry_after(self, response):
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(seconds, 0), self.retry_after_max)
+
+    def warm_up(self):
+        # 最初の翻訳でTLSの接続待ちが発生しないよう、接続を確立してプールに残しておく
+        try:
+            self.session.head(self.url, timeout=self.timeout)
+        except self.exceptions as e:
+            print("Failed to warm up translation client:", e)
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "requests": self.request_count,
+                "retries": self.retry_count,
+                "characters": self.character_count,
+            }
+
+    def close(self):
+        self.session.close()
+
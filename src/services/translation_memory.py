@@ -0,0 +1,138 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import config
+from services.text_similarity import normalize_text
+
+# 保存される訳文の形式が変わったら上げる (古いエントリは破棄される)
+# 2: 前後の文脈を翻訳対象に連結せず、contextパラメータで渡すようになった
+# 3: 記号を絵文字に置き換えず、用語集と同じく原文のまま残すようになった
+SCHEMA_VERSION = 3
+
+
+class TranslationMemory:
+    def __init__(self, path="translation_memory.db", max_entries=50000, memory_size=1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_characters = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS translations")
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " source TEXT NOT NULL,"
+            " target_lang TEXT NOT NULL,"
+            " formality TEXT NOT NULL,"
+            " context TEXT NOT NULL,"
+            " translation TEXT NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (source, target_lang, formality, context))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self.connection.commit()
+
+    def make_key(self, text, target_lang, formality, context=""):
+        return normalize_text(text), target_lang, formality, context
+
+    def get(self, text, target_lang="JA", formality="prefer_more", context=""):
+        key = self.make_key(text, target_lang, formality, context)
+        with self.lock:
+            translation = self.memory.get(key)
+            if translation is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                self.saved_characters += len(key[0])
+                return translation
+
+            row = self.connection.execute(
+                "SELECT translation FROM translations"
+                " WHERE source = ? AND target_lang = ? AND formality = ? AND context = ?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            translation = row[0]
+            self.connection.execute(
+                "UPDATE translations SET last_used = ?"
+                " WHERE source = ? AND target_lang = ? AND formality = ? AND context = ?", (time.time(), *key)
+            )
+            self.connection.commit()
+            self._remember(key, translation)
+            self.disk_hits += 1
+            self.saved_characters += len(key[0])
+            return translation
+
+    def get_any_context(self, text, target_lang="JA", formality="prefer_more"):
+        # 文脈を問わず、同じ原文の最後に使われた訳を返す (オフライン時の代替用)
+        source = normalize_text(text)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT translation FROM translations WHERE source = ? AND target_lang = ? AND formality = ?"
+                " ORDER BY last_used DESC LIMIT 1", (source, target_lang, formality)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, text, translation, target_lang="JA", formality="prefer_more", context=""):
+        key = self.make_key(text, target_lang, formality, context)
+        with self.lock:
+            self._remember(key, translation)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO translations"
+                " (source, target_lang, formality, context, translation, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)", (*key, translation, time.time())
+            )
+            self._evict()
+            self.connection.commit()
+
+    def _remember(self, key, translation):
+        self.memory[key] = translation
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def _evict(self):
+        count = self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.max_entries:
+            self.connection.execute(
+                "DELETE FROM translations WHERE rowid IN"
+                " (SELECT rowid FROM translations ORDER BY last_used LIMIT ?)", (count - self.max_entries,)
+            )
+
+    def stats(self):
+        with self.lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "saved_characters": self.saved_characters,
+            }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+_translation_memory = None
+_translation_memory_lock = threading.Lock()
+
+
+def get_translation_memory():
+    global _translation_memory
+    with _translation_memory_lock:
+        if _translation_memory is None:
+            _translation_memory = TranslationMemory(config.TRANSLATION_MEMORY_PATH,
+                                                    config.TRANSLATION_MEMORY_MAX_ENTRIES)
+        return _translation_memory
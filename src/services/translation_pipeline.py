@@ -0,0 +1,229 @@
+import asyncio
+import threading
+import time
+
+from services.change_detector import ChangeDetector
+from services.metrics import get_metrics
+from services.ocr_worker import ocr_image, ocr_worker_count
+from services.poll_scheduler import AdaptivePollScheduler
+from services.profiling import run_profiled
+from services.screen_capture import ScreenCapture
+from services.text_similarity import is_same_text
+from services.text_stabilizer import TextStabilizer
+from services.translation_scheduler import create_translation_scheduler
+
+
+class TranslationPipeline:
+    # キャプチャ → OCR → 翻訳 を専用スレッドのイベントループで動かす
+    def __init__(self, settings, snapshot, on_result, ocr_executor, translation_executor,
+                 ocr_concurrency=None, screen_capture=None, ocr_cache=None, recorder=None, profile_path=None):
+        self.settings = settings
+        self.snapshot = snapshot
+        self.on_result = on_result
+        self.ocr_executor = ocr_executor
+        # 既定ではOCRプールのワーカー数だけ同時にOCRする
+        self.ocr_concurrency = ocr_concurrency or ocr_worker_count()
+        self.screen_capture = screen_capture or ScreenCapture()
+        self.ocr_cache = ocr_cache
+        self.recorder = recorder
+        self.profile_path = profile_path
+        self.metrics = get_metrics()
+        if ocr_cache is not None:
+            self.metrics.add_source("ocr_cache", ocr_cache.stats)
+        self.change_detector = ChangeDetector(threshold=settings.change_threshold)
+        self.stabilizer = TextStabilizer(settle_time=settings.settle_time)
+        self.scheduler = AdaptivePollScheduler(min_interval=settings.poll_min_interval,
+                                               backoff=settings.poll_backoff)
+        self.translator = create_translation_scheduler(translation_executor)
+        self.metrics.add_source("translation_scheduler", self.translator.stats)
+        self.last_texts = {}
+        self.latest_frames = {}
+        self.queued_at = {}
+        self.generations = {}
+        self.translation_tasks = {}
+        self.loop = None
+        self.main_task = None
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.run_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.loop is not None and self.main_task is not None:
+            self.loop.call_soon_threadsafe(self.main_task.cancel)
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def run_forever(self):
+        try:
+            if self.profile_path:
+                run_profiled(self.profile_path, asyncio.run, self.run())
+            else:
+                asyncio.run(self.run())
+        except asyncio.CancelledError:
+            pass
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.main_task = asyncio.current_task()
+        self.latest_frames.clear()
+        self.translation_tasks.clear()
+        # 同じ領域はキューに1つだけ積み、OCR時には最新のフレームを使う
+        ocr_queue = asyncio.Queue(maxsize=max(len(self.settings.regions), 1))
+        workers = [asyncio.create_task(self.ocr_stage(ocr_queue)) for _ in range(self.ocr_concurrency)]
+        try:
+            await self.capture_stage(ocr_queue)
+            # 録画の再生が終わったら、残りのOCRと翻訳を待ってから終了する
+            await self.drain(ocr_queue)
+        finally:
+            for task in workers + list(self.translation_tasks.values()):
+                task.cancel()
+            await asyncio.gather(*workers, *self.translation_tasks.values(), return_exceptions=True)
+
+    async def drain(self, ocr_queue):
+        await ocr_queue.join()
+        while self.translation_tasks:
+            await asyncio.gather(*self.translation_tasks.values(), return_exceptions=True)
+
+    def active_regions(self):
+        auto_translate = self.snapshot.auto_translate
+        return {i: region.bbox for i, region in enumerate(self.settings.regions)
+                if i < len(auto_translate) and auto_translate[i] and region.bbox}
+
+    async def capture_stage(self, ocr_queue):
+        while True:
+            # 変化のない領域ほど間隔を伸ばし、間隔設定 (秒) を上限とする
+            max_interval = max(self.snapshot.interval, self.scheduler.min_interval)
+            self.scheduler.max_interval = max_interval
+            active_regions = self.active_regions()
+            self.stabilizer.retain(active_regions)
+            self.scheduler.retain(active_regions)
+            for i in active_regions:
+                region = self.settings.regions[i]
+                self.scheduler.set_policy(i, region.poll_min_interval, region.poll_max_interval)
+            # 再生が終わったフレームソースは最後のフレームを全領域で確認してから止める
+            finished = self.screen_capture.finished
+            if finished:
+                due_regions = dict(active_regions)
+            else:
+                due_regions = {i: active_regions[i]
+                               for i in self.scheduler.due(active_regions, self.screen_capture.clock())}
+            self.metrics.increment("ticks")
+            start = time.perf_counter()
+            try:
+                screenshots = await self.loop.run_in_executor(None, self.screen_capture.grab_regions, due_regions)
+            except Exception as e:
+                print(f"キャプチャ失敗: {e}")
+                screenshots = {}
+            if due_regions:
+                self.metrics.observe("capture", (time.perf_counter() - start) * 1000)
+            now = self.screen_capture.clock()
+            for i in due_regions:
+                screenshot = screenshots.get(i)
+                if screenshot is None:
+                    self.scheduler.record(i, False, now)
+                    continue
+                changed = self.change_detector.has_changed(i, screenshot)
+                if changed and self.recorder is not None:
+                    self.recorder.record_frame(i, due_regions[i], screenshot)
+                # 表示が止まってから1回だけOCR・翻訳する
+                settled = self.stabilizer.observe(i, changed, now)
+                self.scheduler.record(i, changed or settled or self.stabilizer.is_settling(i), now)
+                if settled:
+                    queued = i in self.latest_frames
+                    self.latest_frames[i] = screenshot
+                    if not queued:
+                        self.queued_at[i] = time.perf_counter()
+                        await ocr_queue.put(i)
+                else:
+                    self.metrics.increment("ocr_skipped", region=i)
+            if finished and not any(self.stabilizer.is_settling(i) for i in active_regions):
+                return
+            if not self.screen_capture.realtime:
+                # 仮想時間では、OCRと翻訳が終わるまで次のフレームに進まない (実時間の再生と同じ結果にする)
+                await self.drain(ocr_queue)
+            wait = self.scheduler.wait_time(active_regions, max_interval, self.screen_capture.clock())
+            await self.screen_capture.sleep(wait if active_regions else max_interval)
+
+    async def ocr_stage(self, ocr_queue):
+        while True:
+            i = await ocr_queue.get()
+            screenshot = self.latest_frames.pop(i, None)
+            try:
+                if screenshot is None:
+                    continue
+                steps = self.settings.regions[i].preprocess
+                start = time.perf_counter()
+                self.metrics.observe("ocr_queue", (start - self.queued_at.pop(i, start)) * 1000, i)
+                new_text, success = await self.recognize(i, screenshot, steps)
+                ocr_ms = (time.perf_counter() - start) * 1000
+                self.metrics.observe("ocr", ocr_ms, i)
+                if self.recorder is not None:
+                    self.recorder.record_ocr(i, new_text, ocr_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"選択範囲 {i + 1}: OCR失敗: {e}")
+                continue
+            finally:
+                ocr_queue.task_done()
+
+            # OCRの揺れによる1〜2文字の違いは同じテキストとみなす
+            if success and not is_same_text(new_text, self.last_texts.get(i, "")):
+                self.last_texts[i] = new_text
+                self.submit_translation(i, new_text)
+            else:
+                self.metrics.increment("translation_skipped", region=i)
+
+    async def recognize(self, i, screenshot, steps):
+        # 以前に見たことのある画像ならTesseractを実行しない
+        cache_key = None
+        if self.ocr_cache is not None:
+            cached_text, cache_key = self.ocr_cache.get(screenshot, steps)
+            if cached_text is not None:
+                self.metrics.increment("ocr_cache_hits", region=i)
+                return cached_text, bool(cached_text)
+        self.metrics.increment("ocr_run", region=i)
+        start = time.perf_counter()
+        new_text, success, timings = await self.loop.run_in_executor(self.ocr_executor, ocr_image, screenshot, steps)
+        for name, ms in timings.items():
+            self.metrics.observe(f"preprocess_{name}", ms, i)
+        if self.ocr_cache is not None:
+            self.ocr_cache.put(cache_key, new_text, (time.perf_counter() - start) * 1000)
+        return new_text, success
+
+    def submit_translation(self, i, new_text):
+        # 翻訳中に同じ領域のテキストが変わったら、古い翻訳は取り消す
+        generation = self.generations.get(i, 0) + 1
+        self.generations[i] = generation
+        stale = self.translation_tasks.pop(i, None)
+        if stale is not None:
+            stale.cancel()
+            self.metrics.increment("translation_cancelled", region=i)
+        self.translation_tasks[i] = asyncio.create_task(self.translation_stage(i, new_text, generation))
+
+    async def translation_stage(self, i, new_text, generation):
+        context_before, context_after = self.snapshot.get_context(i)
+        start = time.perf_counter()
+        future = self.translator.submit(new_text, context_before=context_before, context_after=context_after,
+                                        priority=self.settings.regions[i].priority)
+        try:
+            translated_text = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"選択範囲 {i + 1}: 翻訳失敗: {e}")
+            self.metrics.increment("translation_failures", region=i)
+            return
+        finally:
+            if self.translation_tasks.get(i) is asyncio.current_task():
+                del self.translation_tasks[i]
+        self.metrics.observe("translation", (time.perf_counter() - start) * 1000, i)
+        if self.generations.get(i) == generation:
+            if self.recorder is not None:
+                self.recorder.record_translation(i, new_text, translated_text)
+            self.on_result(i, new_text, translated_text)
@@ -0,0 +1,261 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import config
+from services.translation_service import lookup_texts, send_texts
+
+
+class BudgetExceededError(Exception):
+    pass
+
+
+class TokenBucket:
+    # rate: 1秒あたりのリクエスト数。burst 回までは続けて送れる
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now=None):
+        with self.lock:
+            self.refill(time.monotonic() if now is None else now)
+            return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now=None):
+        with self.lock:
+            self.refill(time.monotonic() if now is None else now)
+            self.tokens -= 1
+
+
+class CharacterBudget:
+    # 直近 window 秒間に送った文字数を bucket_seconds ごとに集計し、再起動後も引き継ぐ
+    def __init__(self, path=None, window=30 * 86400, soft_limit=None, hard_limit=None, bucket_seconds=3600):
+        self.path = path
+        self.window = window
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.bucket_seconds = bucket_seconds
+        self.usage = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.usage = {int(start): characters for start, characters in data["usage"].items()}
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            print("Failed to load character budget:", e)
+
+    def save(self):
+        if not self.path:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"window": self.window, "usage": {str(start): n for start, n in self.usage.items()}}, f)
+        os.replace(temp_path, self.path)
+
+    def prune(self, now):
+        oldest = now - self.window
+        for start in [start for start in self.usage if start + self.bucket_seconds <= oldest]:
+            del self.usage[start]
+
+    def used(self, now=None):
+        with self.lock:
+            self.prune(time.time() if now is None else now)
+            return sum(self.usage.values())
+
+    def record(self, characters, now=None):
+        now = time.time() if now is None else now
+        start = int(now // self.bucket_seconds * self.bucket_seconds)
+        with self.lock:
+            self.prune(now)
+            self.usage[start] = self.usage.get(start, 0) + characters
+            try:
+                self.save()
+            except OSError as e:
+                print("Failed to save character budget:", e)
+
+    def level(self, characters=0, now=None):
+        # "hard": 送信しない / "soft": 優先度の高い領域だけ送る / "ok"
+        used = self.used(now) + characters
+        if self.hard_limit is not None and used > self.hard_limit:
+            return "hard"
+        if self.soft_limit is not None and used > self.soft_limit:
+            return "soft"
+        return "ok"
+
+    def stats(self):
+        return {"used": self.used(), "soft_limit": self.soft_limit, "hard_limit": self.hard_limit,
+                "level": self.level()}
+
+
+class TranslationScheduler:
+    # 翻訳APIの手前で、優先度の高い領域から順にまとめて送る。
+    # レート制限中は低優先度の翻訳を後回しにし、文字数の予算を超えたらキャッシュからのみ返す
+    def __init__(self, target_lang="JA", formality="prefer_more", executor=None, linger=0.0,
+                 requests_per_second=None, burst=1, budget=None, essential_priority=1, max_batch=50):
+        self.target_lang = target_lang
+        self.formality = formality
+        self.executor = executor
+        self.linger = linger
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.budget = budget
+        self.essential_priority = essential_priority
+        self.max_batch = max_batch
+        self.queue = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.thread = None
+        # 翻訳メモリになかった翻訳の番号 → 送信用に用語集で保護した (context, protected, values)。
+        # レート制限でキューに戻しても、送信時にも翻訳メモリを引き直さない
+        self.prepared = {}
+        self.deferred = 0
+        self.cache_only = 0
+
+    def submit(self, text, context_before="", context_after="", priority=1):
+        future = Future()
+        with self.condition:
+            heapq.heappush(self.queue, (-priority, next(self.sequence), (text, context_before, context_after), future))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return future
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+            if self.linger > 0:
+                # 最初の1件からlinger秒の間に届いた分をまとめて送る
+                time.sleep(self.linger)
+            wait = self.dispatch()
+            if wait > 0:
+                with self.condition:
+                    self.condition.wait(wait)
+
+    def pop_batch(self):
+        batch = []
+        with self.condition:
+            while self.queue and len(batch) < self.max_batch:
+                item = heapq.heappop(self.queue)
+                # 送る前に取り消された翻訳 (古くなったテキスト) は捨てる
+                if not item[3].cancelled():
+                    batch.append(item)
+                else:
+                    self.prepared.pop(item[1], None)
+        return batch
+
+    def dispatch(self):
+        # 次に送れるまでの待ち時間を返す
+        batch = self.pop_batch()
+        if not batch:
+            return 0
+        misses = self.resolve_from_cache(batch)
+        if not misses:
+            return 0
+        if self.budget is not None:
+            misses = self.apply_budget(misses)
+            if not misses:
+                return 0
+        if self.bucket is not None:
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                # 待っている間に届いた優先度の高い翻訳を先に送れるよう、キューに戻す
+                with self.condition:
+                    for item in misses:
+                        heapq.heappush(self.queue, item)
+                self.deferred += len(misses)
+                return wait
+            self.bucket.take()
+        prepared = [self.prepared.pop(item[1]) for item in misses]
+        if self.executor is not None:
+            self.executor.submit(self.send, misses, prepared)
+        else:
+            self.send(misses, prepared)
+        return 0
+
+    def apply_budget(self, misses):
+        # 優先度の高い順に予算を割り当て、上限を超える分はキャッシュにないものとして失敗させる
+        sendable = []
+        characters = 0
+        for item in misses:
+            level = self.budget.level(characters + len(item[2][0]))
+            if level == "ok" or (level == "soft" and -item[0] >= self.essential_priority):
+                sendable.append(item)
+                characters += len(item[2][0])
+            else:
+                self.cache_only += 1
+                self.fail(item, BudgetExceededError(f"文字数の上限 ({level}) に達したためキャッシュのみ"))
+        return sendable
+
+    def resolve_from_cache(self, batch):
+        unchecked = [item for item in batch if item[1] not in self.prepared]
+        cached = {}
+        if unchecked:
+            results, pending = lookup_texts([item[2] for item in unchecked], self.target_lang, self.formality)
+            cached = {item[1]: translation for item, translation in zip(unchecked, results)}
+            for index, *prepared in pending:
+                self.prepared[unchecked[index][1]] = prepared
+        misses = []
+        for item in batch:
+            translation = cached.get(item[1])
+            if translation is None:
+                misses.append(item)
+            elif item[3].set_running_or_notify_cancel():
+                item[3].set_result(translation)
+        return misses
+
+    def fail(self, item, error):
+        self.prepared.pop(item[1], None)
+        if item[3].set_running_or_notify_cancel():
+            item[3].set_exception(error)
+
+    def send(self, batch, prepared):
+        sendable = [(item, entry) for item, entry in zip(batch, prepared) if item[3].set_running_or_notify_cancel()]
+        if not sendable:
+            return
+        batch = [item for item, _ in sendable]
+        pending = [(index, *entry) for index, (_, entry) in enumerate(sendable)]
+        try:
+            translations = send_texts([item[2] for item in batch], pending, self.target_lang, self.formality)
+        except Exception as e:
+            for item in batch:
+                item[3].set_exception(e)
+            return
+        if self.budget is not None:
+            self.budget.record(sum(len(item[2][0]) for item in batch))
+        for item, translation in zip(batch, translations):
+            item[3].set_result(translation)
+
+    def stats(self):
+        with self.condition:
+            queued = len(self.queue)
+        stats = {"queued": queued, "deferred": self.deferred, "cache_only": self.cache_only}
+        if self.budget is not None:
+            stats["budget"] = self.budget.stats()
+        return stats
+
+
+def create_translation_scheduler(executor=None, linger=0.05):
+    budget = CharacterBudget(config.CHARACTER_BUDGET_PATH, config.CHARACTER_BUDGET_WINDOW_DAYS * 86400,
+                             config.CHARACTER_BUDGET_SOFT_LIMIT, config.CHARACTER_BUDGET_HARD_LIMIT)
+    return TranslationScheduler(executor=executor, linger=linger,
+                                requests_per_second=config.TRANSLATION_REQUESTS_PER_SECOND,
+                                burst=config.TRANSLATION_BURST, budget=budget,
+                                essential_priority=config.TRANSLATION_ESSENTIAL_PRIORITY)
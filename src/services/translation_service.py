@@ -1,34 +1,87 @@
-import re
-from emoji import emojize
-import requests
-
-import config
-
-
-def translate_text(text, target_lang="JA", context_before="", context_after=""):
-    if not text.strip():
-        return text
-
-    text = re.sub(r'@|®|©|¥|™', emojize(":two_hearts:", language="alias", variant="emoji_type"), text)
-
-    url = "https://api.deepl.com/v2/translate"
-    params = {
-        "auth_key": config.DEEPL_API_KEY,
-        "text": context_before + text + context_after,
-        "target_lang": target_lang,
-        "split_sentences": "1",
-        "formality": "prefer_more"
-    }
-    response = requests.post(url, data=params)
-    if response.status_code == 200:
-        translations = response.json()['translations']
-        translated_sentences = [t['text'] for t in translations]
-        translated_text = "".join(translated_sentences)
-
-        # 翻訳後のテキストで記号を置換
-        translated_text = re.sub(r'@|®|©|¥', emojize(":pink heart:", language="alias", variant="emoji_type"), translated_text)
-
-        return translated_text
-    else:
-        print("Failed to translate:", response.text)
-        return "Translation failed."
+import time
+
+from services.glossary import PLACEHOLDER_TAG, get_glossary
+from services.backend_registry import get_backend_registry
+from services.translation_client import TranslationError
+from services.metrics import get_metrics
+from services.translation_memory import get_translation_memory
+from services.text_similarity import normalize_text
+
+metrics = get_metrics()
+metrics.add_source("translation_backends", lambda: get_backend_registry().stats())
+metrics.add_source("translation_memory", lambda: get_translation_memory().stats())
+
+
+def translate_text(text, target_lang="JA", context_before="", context_after="", formality="prefer_more"):
+    return translate_texts([(text, context_before, context_after)], target_lang, formality)[0]
+
+
+def translate_texts(segments, target_lang="JA", formality="prefer_more", cache_only=False):
+    # segments: [(text, context_before, context_after), ...]
+    # キャッシュにない分だけを1回のリクエストにまとめて送信する。cache_onlyなら送信せず、ない分はNoneを返す
+    results, pending = lookup_texts(segments, target_lang, formality)
+    if not pending or cache_only:
+        return results
+    for (index, *_), translation in zip(pending, send_texts(segments, pending, target_lang, formality)):
+        results[index] = translation
+    return results
+
+
+def lookup_texts(segments, target_lang="JA", formality="prefer_more"):
+    # 翻訳メモリから引けた訳 (ない分はNone) と、送信が必要な [(index, context, protected, values)] を返す
+    memory = get_translation_memory()
+    glossary = get_glossary()
+    results = [None] * len(segments)
+    pending = []
+    for index, (text, context_before, context_after) in enumerate(segments):
+        if not text.strip():
+            results[index] = text
+            continue
+        # 用語集の語は訳語に置き換えて翻訳させない。訳語が変わったら訳し直す
+        protected, values = glossary.protect(text)
+        context = normalize_text(context_before) + "\n" + normalize_text(context_after)
+        if values:
+            context += "\n" + "\t".join(values)
+        cached = memory.get(text, target_lang, formality, context)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.append((index, context, protected, values))
+    return results, pending
+
+
+def send_texts(segments, pending, target_lang="JA", formality="prefer_more"):
+    # lookup_textsで引けなかった分を翻訳メモリを引き直さずに送信し、pendingの順に訳を返す
+    memory = get_translation_memory()
+    glossary = get_glossary()
+    # 前後の領域のテキストは翻訳対象に含めず、DeepLのcontextパラメータで渡す。
+    # contextはリクエスト単位なので、まとめて送る全セグメントの前後テキストを1つにする
+    texts = []
+    context_lines = []
+    for index, _, protected, _ in pending:
+        _, context_before, context_after = segments[index]
+        texts.append(protected)
+        for line in (normalize_text(context_before), normalize_text(context_after)):
+            if line and line not in context_lines:
+                context_lines.append(line)
+
+    start = time.perf_counter()
+    try:
+        translations, backend = get_backend_registry().translate(texts, target_lang, formality,
+                                                                 "\n".join(context_lines), tag_handling="xml",
+                                                                 ignore_tags=PLACEHOLDER_TAG)
+    except TranslationError:
+        # 失敗した訳は翻訳メモリに残さず、呼び出し側に任せる
+        metrics.increment("translation_request_failures")
+        raise
+
+    metrics.observe("translation_request", (time.perf_counter() - start) * 1000)
+    metrics.increment("segments_sent", len(texts))
+    results = []
+    for (index, context, _, values), translation in zip(pending, translations):
+        translated_text = glossary.restore(translation, values)
+        # 翻訳メモリから借りた訳をこの文脈の訳として残すと、この文脈ではDeepLに二度と問い合わせなくなる
+        if backend.cache_results:
+            memory.put(segments[index][0], translated_text, target_lang, formality, context)
+        results.append(translated_text)
+    return results
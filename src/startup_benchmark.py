@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+EVENTS = ["imported", "first_paint", "warm_up_done", "first_translation"]
+
+
+def run_once(until, timeout):
+    # 起動からの各イベントまでの時間 (ms) を子プロセスに記録させる
+    fd, trace_path = tempfile.mkstemp(suffix=".jsonl")
+    os.close(fd)
+    env = dict(os.environ, NST_STARTUP_TRACE=trace_path, NST_STARTUP_EXIT_AFTER=until)
+    start = time.time()
+    process = subprocess.Popen([sys.executable, os.path.join(project_root, "screen_translator.py")],
+                               cwd=project_root, env=env)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    timings = {}
+    with open(trace_path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            # 子プロセスが同じイベントを書いても最初の1回を使う
+            timings.setdefault(entry["event"], (entry["time"] - start) * 1000)
+    os.remove(trace_path)
+    return timings
+
+
+def summarize(runs):
+    summary = {}
+    for event in EVENTS:
+        values = sorted(run[event] for run in runs if event in run)
+        if values:
+            summary[event] = {
+                "runs": len(values),
+                "min": values[0],
+                "median": values[len(values) // 2],
+                "max": values[-1],
+            }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="起動から最初の描画・最初の翻訳までの時間を測る")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--until", choices=EVENTS[1:], default="warm_up_done",
+                        help="このイベントで終了する (first_translation には自動翻訳する領域の設定が必要)")
+    parser.add_argument("--timeout", type=float, default=60, help="1回あたりの最大待ち時間 (秒)")
+    parser.add_argument("--output", default="startup_result.json", help="結果のJSONファイル")
+    args = parser.parse_args(argv)
+
+    runs = [run_once(args.until, args.timeout) for _ in range(args.runs)]
+    result = {"until": args.until, "runs": runs, "summary_ms": summarize(runs)}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(json.dumps(result["summary_ms"], ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
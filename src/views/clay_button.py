@@ -5,10 +5,18 @@ from config import BUTTON_BG_COLOR, BUTTON_ACTIVE_BG_COLOR, BUTTON_FG_COLOR
 
 
 class ClayButton(ttk.Button):
+    style_configured = False
+
     def __init__(self, master=None, **kwargs):
         super().__init__(master, **kwargs)
         self.configure(style="Clay.TButton")
+        # スタイルはボタンごとではなく最初の1回だけ設定する
+        if not ClayButton.style_configured:
+            ClayButton.configure_style()
+            ClayButton.style_configured = True
 
+    @staticmethod
+    def configure_style():
         style = ttk.Style()
         style.configure("Clay.TButton",
                         background=BUTTON_BG_COLOR,
@@ -13,9 +13,9 @@ class ResultFrame(ttk.Frame):
         self.result_labels = []
         self.result_texts = []
         self.translated_text_boxes = []
-        self.auto_translate_vars = [tk.IntVar(value=int(x)) for x in settings.auto_translate]
+        self.auto_translate_vars = [tk.IntVar(value=int(region.auto_translate)) for region in settings.regions]
 
-        for i in range(3):
+        for i in range(len(settings.regions)):
             self.create_result_section(i)
 
     def create_result_section(self, i):
@@ -57,7 +57,7 @@ class ResultFrame(ttk.Frame):
         translate_button.pack(side=tk.BOTTOM, pady=5)
 
     def highlight_selected_region(self, index):
-        region = self.settings.regions[index]
+        region = self.settings.regions[index].bbox
         if region:
             x1, y1, x2, y2 = region
             highlight_window = SelectionWindow(self.master, region)
@@ -68,7 +68,7 @@ class ResultFrame(ttk.Frame):
         selected_region = selection_window.get_selected_region()
 
         if all(selected_region):
-            self.settings.regions[index] = selected_region
+            self.settings.regions[index].bbox = selected_region
 
     def get_context(self, index, text):
         context_before = ""
@@ -92,7 +92,7 @@ class ResultFrame(ttk.Frame):
         print(f"選択範囲 {i + 1}: 自動翻訳完了 (間隔: {self.master.interval_frame.interval_var.get()}秒)")
 
     def translate_region(self, index):
-        region = self.settings.regions[index]
+        region = self.settings.regions[index].bbox
         if region:
             text, success = self.ocr_controller.get_text_from_region(region)
             if success:
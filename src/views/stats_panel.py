@@ -0,0 +1,61 @@
+import tkinter as tk
+
+from config import BG_COLOR, TEXT_BG_COLOR, TEXT_FG_COLOR
+
+REFRESH_INTERVAL_MS = 1000
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def format_snapshot(snapshot):
+    lines = [f"{'段階':<22}{'領域':>5}{'回数':>8}{'p50':>9}{'p95':>9}{'max':>9}  (ms)"]
+    for stage, regions in sorted(snapshot["stages"].items()):
+        for region, summary in sorted(regions.items(), key=lambda item: (item[0] == "all", item[0])):
+            if region == "all" and len(regions) == 2:
+                continue
+            lines.append(f"{stage:<22}{region:>5}{summary['count']:>8}{format_ms(summary['p50']):>9}"
+                         f"{format_ms(summary['p95']):>9}{format_ms(summary['max']):>9}")
+    lines.append("")
+    for name, counter in sorted(snapshot["counters"].items()):
+        regions = ", ".join(f"{region}: {value}" for region, value in counter.items() if region != "total")
+        lines.append(f"{name:<22}{counter['total']:>8}  {regions}")
+    for name, stats in sorted(snapshot["sources"].items()):
+        lines.append("")
+        lines.append(name)
+        for key, value in stats.items():
+            if isinstance(value, float):
+                value = f"{value:.3f}"
+            lines.append(f"  {key:<20}{value}")
+    return "\n".join(lines)
+
+
+class StatsPanel(tk.Toplevel):
+    # パイプラインの段階ごとの所要時間とカウンタを1秒ごとに表示する
+    def __init__(self, master, metrics, on_close=None):
+        super().__init__(master)
+        self.title("統計")
+        self.configure(bg=BG_COLOR)
+        self.metrics = metrics
+        self.on_close = on_close
+        self.text = tk.Text(self, width=80, height=32, font=("Consolas", 10), bg=TEXT_BG_COLOR, fg=TEXT_FG_COLOR,
+                            borderwidth=0, state="disabled")
+        self.text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.refresh_job = None
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def refresh(self):
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", format_snapshot(self.metrics.snapshot()))
+        self.text.configure(state="disabled")
+        self.refresh_job = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.after_cancel(self.refresh_job)
+        if self.on_close is not None:
+            self.on_close()
+        self.destroy()